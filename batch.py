@@ -0,0 +1,222 @@
+"""
+Пакетное решение игровых полей.
+
+Поля читаются из файла или стандартного ввода: либо по одному JSON-объекту в строке
+({"id": ..., "rows": ["...", ...]}), либо строками букв, поля разделяются пустой строкой.
+Заблокированные ячейки поля неправильной формы обозначаются точкой или пробелом, строки могут быть разной длины.
+Результаты выводятся в порядке ввода по одной JSON-строке на поле.
+
+    python batch.py boards.txt --workers 4 > solutions.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from lexicon import Lexicon
+from part_3_3 import Board, FillBudget, WordBuckets, WordPath, iter_words, exact_cover_fill
+from solution_cache import SOLUTION_CACHE_SIZE, SolutionCache
+
+
+# Словарь по умолчанию, реестр словарей других языков и кеши решений процесса-обработчика
+_worker_lexicon = None
+_worker_registry = None
+_worker_caches = {}  # Язык (None - словарь по умолчанию) -> кеш решений
+_worker_cache_options = (0, None)  # Размер кеша в памяти и каталог кеша на диске
+
+
+def read_boards(lines):
+    """
+    Генератор пар (идентификатор, строки поля) из строк ввода.
+    Для записи, которую не удалось разобрать, строки поля - None: ошибка попадает в результат этого поля.
+    """
+    number = 0  # Номер поля во вводе, используется как идентификатор по умолчанию
+    rows = []  # Строки текущего поля в текстовом формате
+    for line in lines:
+        line = line.rstrip('\r\n')  # Пробелы в начале строки - заблокированные ячейки
+        if line.lstrip().startswith('{'):  # Поле в формате JSON
+            number += 1
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield number, None
+                continue
+            yield data.get('id', number), data.get('rows')
+        elif line.strip():
+            rows.append(line)
+        elif rows:  # Пустая строка завершает поле в текстовом формате
+            number += 1
+            yield number, rows
+            rows = []
+    if rows:
+        number += 1
+        yield number, rows
+
+
+def solve_board(board_id, rows, lexicon, engine='substring', cache=None, max_seconds=None):
+    """
+    Решение одного поля, результат - словарь для вывода в JSON.
+    cache - необязательный SolutionCache: повторное, повернутое или отраженное поле берется из кеша.
+    max_seconds - необязательное время решения: поле, которое не успели заполнить, возвращается
+    с признаком timed_out и в кеш не попадает.
+    """
+    if rows is None:
+        return {'id': board_id, 'error': 'Неверная запись поля'}
+    if not isinstance(rows, list) or not all(isinstance(row, str) for row in rows):
+        return {'id': board_id, 'error': 'rows - список строк поля'}
+
+    cached = cache.get(rows, engine) if cache is not None else None
+    board = Board(rows, lexicon=lexicon)
+    if not board.cells:
+        return {'id': board_id, 'error': 'На поле нет ни одной ячейки с буквой'}
+
+    budget = FillBudget(max_seconds) if max_seconds is not None else None  # Отсчет вместе с поиском слов
+    timed_out = False
+    start = time.perf_counter()
+    if cached is not None:
+        paths, chosen = cached
+        words = [WordPath(board, [board.cells[index] for index in path]) for path in paths]
+        solution = None if chosen is None else [words[number] for number in chosen]
+        search_time, fill_time = time.perf_counter() - start, 0.0
+    else:
+        # Слова раскладываются по длине по мере нахождения и берутся в порядке убывания длины
+        words = WordBuckets(board).extend(iter_words(board, engine=engine, budget=budget)).longest_first()
+        search_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        solution = exact_cover_fill(board, words, budget=budget)
+        fill_time = time.perf_counter() - start
+
+        # Срок проверяется отдельно: заполнение могло не начаться, если поиск слов прерван
+        timed_out = solution is None and budget is not None and budget.expired()
+        if cache is not None and not timed_out:
+            numbers = {id(word_path): number for number, word_path in enumerate(words)}
+            cache.put(rows, engine, [[cell.index for cell in word_path.cells] for word_path in words],
+                      None if solution is None else [numbers[id(word_path)] for word_path in solution])
+
+    result = {
+        'id': board_id,
+        'solved': solution is not None,
+        'found': len(words),
+        'words': [{'word': word_path.get_word(), 'cells': [[cell.x, cell.y] for cell in word_path.cells]}
+                  for word_path in solution or []],
+        'timings': {'search': round(search_time, 6), 'fill': round(fill_time, 6)},
+    }
+    if cached is not None:
+        result['cached'] = True
+    if timed_out:
+        result['timed_out'] = True
+    return result
+
+
+def _init_worker(lexicon, cache_size=0, cache_dir=None, registry=None):
+    """
+    Словарь передается процессу-обработчику один раз.
+    registry - необязательный LexiconRegistry: словари других языков загружаются обработчиком при первом запросе.
+    У каждого обработчика свой кеш решений в памяти; каталог кеша на диске у всех общий.
+    """
+    global _worker_lexicon, _worker_registry, _worker_cache_options
+    _worker_lexicon = lexicon
+    _worker_registry = registry
+    _worker_cache_options = (cache_size, cache_dir)
+
+
+def _worker_cache(language, lexicon):
+    """ Кеш решений обработчика для языка, None - если кеш выключен """
+    cache_size, cache_dir = _worker_cache_options
+    if not (cache_size or cache_dir):
+        return None
+    cache = _worker_caches.get(language)
+    if cache is None or cache.digest != lexicon.get_digest():  # Словарь языка мог быть загружен заново
+        cache = _worker_caches[language] = SolutionCache(lexicon, cache_size, cache_dir)
+    return cache
+
+
+def _solve_worker(board_id, rows, engine, language=None, deadline=None):
+    """
+    Решение поля в процессе-обработчике; language - язык из реестра, None - словарь по умолчанию.
+    deadline - необязательный срок ответа по time.time(): обработчик сам прекращает заполнение к этому сроку.
+    Ошибка решения возвращается в результате поля, а не прерывает обработку остальных полей.
+    """
+    if language is None:
+        lexicon = _worker_lexicon
+    elif _worker_registry is not None and language in _worker_registry.languages:
+        try:
+            lexicon = _worker_registry.get(language)
+        except FileNotFoundError:
+            return {'id': board_id, 'error': f'Не найден словарь языка {language}'}
+    else:
+        return {'id': board_id, 'error': f'Неизвестный язык {language}'}
+    # Из срока вычитается время, которое поле ждало в очереди пула
+    max_seconds = None if deadline is None else max(deadline - time.time(), 0.0)
+    return solve_board_safely(board_id, rows, lexicon, engine, _worker_cache(language, lexicon), max_seconds)
+
+
+def solve_board_safely(board_id, rows, lexicon, engine='substring', cache=None, max_seconds=None):
+    """ Решение поля (см. solve_board); исключение превращается в результат с ошибкой """
+    try:
+        return solve_board(board_id, rows, lexicon, engine, cache, max_seconds)
+    except Exception as error:  # Одно неверное поле не должно останавливать поток
+        return {'id': board_id, 'error': f'{type(error).__name__}: {error}'}
+
+
+def solve_boards(boards, lexicon, engine='substring', workers=1, cache_size=0, cache_dir=None):
+    """
+    Генератор результатов для последовательности полей в порядке ввода.
+    При workers > 1 поля решаются в пуле процессов; одновременно в работе не больше 2 * workers полей,
+    поэтому память не растет с длиной ввода.
+    cache_size и cache_dir - размер кеша решений в памяти и каталог кеша на диске, по умолчанию кеша нет.
+    """
+    if workers <= 1:
+        cache = SolutionCache(lexicon, cache_size, cache_dir) if cache_size or cache_dir else None
+        for board_id, rows in boards:
+            yield solve_board_safely(board_id, rows, lexicon, engine, cache)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(lexicon, cache_size, cache_dir)) as executor:
+        pending = deque()  # Поля в работе в порядке ввода: (идентификатор, задача)
+        for board_id, rows in boards:
+            pending.append((board_id, executor.submit(_solve_worker, board_id, rows, engine)))
+            if len(pending) >= 2 * workers:
+                yield _result(*pending.popleft())
+        while pending:
+            yield _result(*pending.popleft())
+
+
+def _result(board_id, future):
+    """ Результат задачи пула; ошибка передачи поля или результата превращается в результат с ошибкой """
+    try:
+        return future.result()
+    except Exception as error:
+        return {'id': board_id, 'error': f'{type(error).__name__}: {error}'}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Пакетное решение полей Fillwords')
+    parser.add_argument('input', nargs='?', help='файл с полями, по умолчанию - стандартный ввод')
+    parser.add_argument('--dictionary', default='russian_nouns.txt', help='файл словаря')
+    parser.add_argument('--engine', default='substring',
+                        help='алгоритм поиска слов: substring, trie или vector (нужен NumPy)')
+    parser.add_argument('--workers', type=int, default=1, help='число процессов-обработчиков')
+    parser.add_argument('--cache-size', type=int, default=SOLUTION_CACHE_SIZE,
+                        help='число решений в кеше в памяти, 0 - без кеша')
+    parser.add_argument('--cache-dir', help='каталог кеша решений на диске')
+    args = parser.parse_args(argv)
+
+    # Обработчики пула открывают один разделяемый индекс словаря вместо собственных копий
+    lexicon = Lexicon.load(args.dictionary, shared=args.workers > 1)
+    source = open(args.input, encoding='utf-8') if args.input else sys.stdin
+    try:
+        for result in solve_boards(read_boards(source), lexicon, args.engine, args.workers,
+                                   args.cache_size, args.cache_dir):
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+if __name__ == '__main__':
+    main()
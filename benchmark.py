@@ -0,0 +1,192 @@
+"""
+Замеры скорости поиска слов и заполнения игрового поля.
+
+Набор полей фиксирован: демонстрационные поля 4x4 и 7x7 и случайные поля от 5x5 до 10x10,
+составленные из слов словаря (генератор случайных чисел инициализируется заданным числом,
+поэтому набор воспроизводим). Для каждого поля замеряются find_words, get_words и заполнение поля.
+Время - лучшее из нескольких повторов; пиковая память и статистика поиска (SearchStats)
+снимаются отдельным прогоном, чтобы их учет не влиял на время.
+
+    python benchmark.py --output bench_results.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from lexicon import Lexicon
+from part_3_3 import Board, FeasibilityCheck, find_words, get_words, backtracking_fill, exact_cover_fill
+from search_stats import SearchStats
+
+
+# Демонстрационные поля
+DEMO_BOARDS = {
+    'demo_4x4': ['рило', 'кавт', 'эрай', 'хола'],
+    'demo_7x7': ['еразалс', 'тдалвоо', 'яьещирк', 'хратром', 'инукесб', 'пдарави', 'елагило'],
+}
+
+# Размеры случайных полей
+RANDOM_SIZES = range(5, 11)
+
+# Длины слов, которыми заполняются случайные поля
+RANDOM_WORD_LENGTHS = (3, 8)
+
+
+def random_board(words_by_length, size, rng):
+    """
+    Случайное поле size x size, заполненное словами словаря.
+    Поле разбивается на случайные пути из свободных ячеек, в каждый путь записывается слово подходящей длины.
+    """
+    shortest, longest = RANDOM_WORD_LENGTHS
+    while True:  # Разбиение может не удаться - тогда пробуем заново
+        free = {(x, y) for x in range(size) for y in range(size)}
+        paths = []
+        for start in sorted(free, key=lambda c: (c[1], c[0])):
+            if start not in free:
+                continue
+            path = [start]
+            free.remove(start)
+            target = rng.randint(shortest, longest)
+            while len(path) < target:
+                x, y = path[-1]
+                options = [c for c in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)] if c in free]
+                if not options:
+                    break
+                path.append(rng.choice(options))
+                free.remove(path[-1])
+            if len(path) < shortest:
+                break
+            paths.append(path)
+        else:
+            break
+
+    grid = [[''] * size for _ in range(size)]
+    for path in paths:
+        word = rng.choice(words_by_length[len(path)])
+        for (x, y), letter in zip(path, word):
+            grid[y][x] = letter
+    return [''.join(row) for row in grid]
+
+
+def build_corpus(lexicon, seed):
+    """ Набор полей: имя -> строки поля """
+    words_by_length = {}
+    for word in sorted(lexicon.words):
+        words_by_length.setdefault(len(word), []).append(word)
+
+    rng = random.Random(seed)
+    corpus = dict(DEMO_BOARDS)
+    for size in RANDOM_SIZES:
+        corpus[f'random_{size}x{size}'] = random_board(words_by_length, size, rng)
+    return corpus
+
+
+def sorted_words(board, engine):
+    """ Слова поля в порядке убывания длины, как в демонстрационном примере """
+    return sorted(get_words(board, engine=engine), key=lambda x: -len(x.get_word()))
+
+
+def make_tasks(rows, lexicon, engine):
+    """
+    Замеряемые задачи поля: имя -> (подготовка, функция от результата подготовки и статистики,
+    описание результата). Подготовка в замер времени не входит, поэтому get_words строит поле
+    внутри замера: построение поля - часть поиска слов.
+    """
+    def new_board():
+        return Board(rows, lexicon=lexicon)
+
+    def prepared():
+        board = new_board()
+        return board, sorted_words(board, engine)
+
+    center = (len(rows[0]) // 2, len(rows) // 2)  # find_words замеряется для центральной ячейки
+    return {
+        'find_words': (new_board, lambda board, stats: find_words(board, board.get_cell(*center), stats, engine), len),
+        'get_words': (lambda: None, lambda _, stats: get_words(new_board(), engine=engine, stats=stats), len),
+        'backtracking_fill': (prepared,
+                              lambda args, stats: backtracking_fill(*args, check=FeasibilityCheck(), stats=stats),
+                              lambda result: result is not None),
+        'exact_cover_fill': (prepared, lambda args, stats: exact_cover_fill(*args, stats=stats),
+                             lambda result: result is not None),
+    }
+
+
+def measure(setup, run, describe, repeat):
+    """ Лучшее время из repeat прогонов, затем пиковая память и счетчики в отдельном прогоне """
+    best = None
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        run(argument, None)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    argument = setup()
+    stats = SearchStats()
+    tracemalloc.start()
+    result = run(argument, stats)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'time': round(best, 6),
+        'peak_memory': peak,
+        'paths': stats.counters['paths_popped'],
+        'nodes': stats.counters['fill_nodes'],
+        'result': describe(result),
+        'stats': stats.to_dict(),
+    }
+
+
+def run_benchmarks(lexicon, seed, engine, repeat, tasks=None, boards=None):
+    """ Генератор результатов замеров """
+    for name, rows in build_corpus(lexicon, seed).items():
+        if boards and name not in boards:
+            continue
+        for task, (setup, run, describe) in make_tasks(rows, lexicon, engine).items():
+            if tasks and task not in tasks:
+                continue
+            record = {'board': name, 'size': f'{len(rows[0])}x{len(rows)}', 'task': task, 'engine': engine}
+            record.update(measure(setup, run, describe, repeat))
+            yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замеры скорости поиска слов и заполнения поля')
+    parser.add_argument('--dictionary', default='russian_nouns.txt', help='файл словаря')
+    parser.add_argument('--engine', default='substring',
+                        help='алгоритм поиска слов: substring, trie или vector (нужен NumPy)')
+    parser.add_argument('--seed', type=int, default=2025, help='начальное число для случайных полей')
+    parser.add_argument('--repeat', type=int, default=3, help='число повторов для замера времени')
+    parser.add_argument('--task', action='append', help='замерять только указанные задачи')
+    parser.add_argument('--board', action='append', help='замерять только указанные поля')
+    parser.add_argument('--output', help='файл для результатов в формате JSON')
+    args = parser.parse_args(argv)
+
+    lexicon = Lexicon.load(args.dictionary)
+    results = []
+    print(f'{"поле":<14} {"задача":<18} {"время, с":>10} {"память, КБ":>11} {"пути":>8} {"узлы":>8}  результат')
+    for record in run_benchmarks(lexicon, args.seed, args.engine, args.repeat, args.task, args.board):
+        results.append(record)
+        print(f'{record["board"]:<14} {record["task"]:<18} {record["time"]:>10.4f} '
+              f'{record["peak_memory"] / 1024:>11.1f} {record["paths"]:>8} {record["nodes"]:>8}  {record["result"]}',
+              flush=True)
+
+    if args.output:
+        report = {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'engine': args.engine,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+def select(columns, rows, row):
+    """ Выбор строки: удаляет покрываемые ею столбцы и все пересекающиеся с ней строки """
+    removed = []  # Удаленные столбцы в порядке удаления
+    for column in rows[row]:
+        for other in columns[column]:
+            for other_column in rows[other]:
+                if other_column != column:
+                    columns[other_column].remove(other)
+        removed.append(columns.pop(column))
+    return removed
+
+
+def deselect(columns, rows, row, removed):
+    """ Отмена выбора строки: восстанавливает столбцы и строки в обратном порядке """
+    for column in reversed(rows[row]):
+        columns[column] = removed.pop()
+        for other in columns[column]:
+            for other_column in rows[other]:
+                if other_column != column:
+                    columns[other_column].add(other)
+
+
+def solve(columns, rows, solution=None, stats=None, budget=None):
+    """
+    Алгоритм X Кнута для задачи точного покрытия.
+    columns - словарь: столбец -> множество покрывающих его строк,
+    rows - словарь: строка -> список покрываемых столбцов.
+    Ветвление идет по столбцу с наименьшим числом строк, строки перебираются в порядке возрастания.
+    Генератор возвращает решения - списки выбранных строк; columns восстанавливается после обхода.
+    stats - необязательный сборщик статистики (SearchStats): узлы и возвраты поиска.
+    budget - необязательное ограничение поиска (FillBudget): когда оно исчерпано, обход прекращается
+    без новых решений, budget.exhausted отличает это от отсутствия решений.
+    """
+    if solution is None:
+        solution = []
+    if stats is not None:
+        stats.count('fill_nodes')
+    if budget is not None and budget.spend():
+        return
+    if not columns:  # Все столбцы покрыты
+        yield list(solution)
+        return
+
+    column = min(columns, key=lambda c: len(columns[c]))  # Столбец с наименьшим числом вариантов
+    for row in sorted(columns[column]):
+        solution.append(row)
+        removed = select(columns, rows, row)
+        yield from solve(columns, rows, solution, stats, budget)
+        deselect(columns, rows, row, removed)
+        if stats is not None:
+            stats.count('fill_backtracks')
+        solution.pop()
+        if budget is not None and budget.exhausted:
+            return
+
+
+def build_columns(rows):
+    """ Словарь столбцов по словарю строк """
+    columns = {}
+    for row, row_columns in rows.items():
+        for column in row_columns:
+            columns.setdefault(column, set()).add(row)
+    return columns
@@ -0,0 +1,618 @@
+import codecs
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from itertools import compress
+
+
+class SubstringIndex:
+    """ Индекс подстрок словаря на основе суффиксного массива """
+
+    def __init__(self, words):
+        """ Построение индекса по множеству слов """
+        self.words = sorted(words)  # Слова словаря, номер слова - его позиция в списке
+        self.text = '\n'.join(self.words) + '\n'  # Все слова подряд, разделенные переводом строки
+
+        # Суффиксы внутри каждого слова: (суффикс, позиция в тексте, номер слова)
+        suffixes = []
+        position = 0
+        for number, word in enumerate(self.words):
+            for i in range(len(word)):
+                suffixes.append((word[i:], position + i, number))
+            position += len(word) + 1
+        suffixes.sort()
+
+        self.suffixes = array('i', (suffix[1] for suffix in suffixes))  # Начала суффиксов в лексикографическом порядке
+        self.owners = array('i', (suffix[2] for suffix in suffixes))  # Номер слова для каждого суффикса
+
+    def _bounds(self, fragment, lo=0, hi=None):
+        """
+        Границы диапазона суффиксов, начинающихся с фрагмента.
+        Поиск можно ограничить диапазоном [lo, hi), который заведомо содержит ответ.
+        """
+        text, suffixes, size = self.text, self.suffixes, len(fragment)
+        if hi is None:
+            hi = len(suffixes)
+        end = hi
+
+        # Левая граница: первый суффикс, не меньший фрагмента
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text[suffixes[mid]:suffixes[mid] + size] < fragment:
+                lo = mid + 1
+            else:
+                hi = mid
+        begin = lo
+
+        # Правая граница: первый суффикс, начало которого больше фрагмента
+        hi = end
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text[suffixes[mid]:suffixes[mid] + size] == fragment:
+                lo = mid + 1
+            else:
+                hi = mid
+        return begin, lo
+
+    def contains(self, fragment):
+        """ Проверяет, входит ли фрагмент хотя бы в одно слово словаря """
+        begin, end = self._bounds(fragment)
+        return begin < end
+
+    def has_fragment(self, fragment):
+        """ Проверяет, входит ли фрагмент или его обращение хотя бы в одно слово словаря """
+        return self.contains(fragment) or self.contains(fragment[::-1])
+
+    def words_containing(self, fragment):
+        """ Множество слов, содержащих фрагмент """
+        begin, end = self._bounds(fragment)
+        return {self.words[self.owners[i]] for i in range(begin, end)}
+
+    def lookup(self, fragment):
+        """ Множество слов, содержащих фрагмент или его обращение """
+        return self.words_containing(fragment) | self.words_containing(fragment[::-1])
+
+
+# Наибольшее число фрагментов в кеше FragmentCache
+FRAGMENT_CACHE_SIZE = 16384
+
+
+class FragmentCache:
+    """
+    Ограниченный LRU-кеш поиска фрагментов в индексе подстрок.
+    Ключ - канонический фрагмент (меньший из фрагмента и его обращения), значение - диапазоны
+    суффиксного массива для ключа и его обращения; по ним восстанавливается и множество слов.
+    Диапазон нового фрагмента ищется внутри диапазона фрагмента на букву короче, если тот в кеше.
+    """
+
+    def __init__(self, index, maxsize=FRAGMENT_CACHE_SIZE):
+        self.index = index
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # Канонический фрагмент -> (диапазон ключа, диапазон обращения)
+        self.hits = 0
+        self.misses = 0
+
+    def _narrowed_bounds(self, fragment):
+        """ Диапазон фрагмента, найденный внутри диапазона фрагмента без последней буквы """
+        parent = fragment[:-1]
+        reverse = parent[::-1]
+        entry = self.entries.get(min(parent, reverse))
+        if entry is None:
+            return self.index._bounds(fragment)
+        lo, hi = entry[0] if parent <= reverse else entry[1]
+        return self.index._bounds(fragment, lo, hi)
+
+    def ranges(self, fragment):
+        """ Диапазоны суффиксного массива для фрагмента и его обращения """
+        reverse = fragment[::-1]
+        key = min(fragment, reverse)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        else:
+            self.misses += 1
+            # Обращение фрагмента на букву длиннее обращения фрагмента без первой буквы
+            entry = (self._narrowed_bounds(key), self._narrowed_bounds(key[::-1]))
+            self.entries[key] = entry
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)  # Удаляем давно не использованный фрагмент
+        return entry if key == fragment else entry[::-1]
+
+    def has_fragment(self, fragment):
+        """ Проверяет, входит ли фрагмент или его обращение хотя бы в одно слово словаря """
+        (begin, end), (reverse_begin, reverse_end) = self.ranges(fragment)
+        return begin < end or reverse_begin < reverse_end
+
+    def lookup(self, fragment):
+        """ Множество слов, содержащих фрагмент или его обращение """
+        words, owners = self.index.words, self.index.owners
+        return {words[owners[i]] for begin, end in self.ranges(fragment) for i in range(begin, end)}
+
+    def hit_rate(self):
+        """ Доля обращений, найденных в кеше """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Признак конца слова в узле префиксного дерева
+WORD_END = '$'
+
+
+class WordTrie:
+    """ Префиксное дерево слов словаря """
+
+    def __init__(self, words):
+        """ Построение дерева по множеству слов """
+        self.root = {}  # Узел дерева - словарь переходов по буквам
+        for word in words:
+            node = self.root
+            for letter in word:
+                node = node.setdefault(letter, {})
+            node[WORD_END] = True
+
+    @staticmethod
+    def is_word(node):
+        """ Проверяет, заканчивается ли в узле слово словаря """
+        return WORD_END in node
+
+
+# Минимальная длина слова словаря
+MIN_WORD_LENGTH = 3
+
+# Во сколько раз словарь поля должен быть меньше исходного, чтобы для него строился отдельный индекс
+REBUILD_RATIO = 20
+
+# Таблицы перевода байтов матрицы вхождений букв: номер таблицы - допустимое число вхождений,
+# байт превращается в 1, если число вхождений больше допустимого
+EXCLUSION_TABLES = [bytes(int(count > limit) for count in range(256)) for limit in range(255)]
+
+# Расширение файла скомпилированного словаря и версия его формата
+CACHE_SUFFIX = '.cache'
+CACHE_VERSION = 2
+
+
+def write_file_atomic(path, parts):
+    """
+    Запись байтовых строк parts в файл path через временный файл: другие процессы не увидят недописанный файл,
+    а уже открывшие прежний файл продолжают работать с ним. При ошибке временный файл удаляется, OSError передается дальше.
+    """
+    temp_file = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_file, 'wb') as file:
+            file.writelines(parts)
+        os.replace(temp_file, path)
+    except OSError:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+def file_hash(filename):
+    """ Хеш содержимого файла """
+    with open(filename, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def read_words(filename):
+    """ Чтение слов из текстового словаря: слова из MIN_WORD_LENGTH и более букв в нижнем регистре """
+    with open(filename, 'r', encoding='utf-8') as file:
+        return set(word.strip().lower() for word in file if len(word.strip()) >= MIN_WORD_LENGTH)
+
+
+class Lexicon:
+    """ Словарь слов вместе с индексами для поиска, общий для нескольких игровых полей """
+
+    def __init__(self, words, index=None, letter_counts=None):
+        """ Инициализация по множеству слов и, если есть, готовым индексу подстрок и матрице вхождений букв """
+        self.words = set(words)
+        self.index = index if index is not None else SubstringIndex(self.words)
+        self.trie = None  # Префиксное дерево словаря, строится при первом обращении
+        self.letter_counts = letter_counts  # Матрица вхождений букв, строится при первом обращении
+        self.digest = None  # Хеш множества слов, вычисляется при первом обращении
+        self.hashed_words = None  # Хеши слов и префиксов для векторного поиска, строятся при первом обращении
+
+    def get_trie(self):
+        """ Префиксное дерево словаря """
+        if self.trie is None:
+            self.trie = WordTrie(self.words)
+        return self.trie
+
+    def get_hashed_words(self):
+        """ Хеши слов словаря и их префиксов для векторного поиска (нужен NumPy) """
+        if self.hashed_words is None:
+            from vector_search import HashedWords  # NumPy нужен только векторному поиску
+            self.hashed_words = HashedWords(self.words)
+        return self.hashed_words
+
+    def get_digest(self):
+        """ Хеш множества слов словаря: одинаков для словарей из одних и тех же слов """
+        if self.digest is None:
+            self.digest = hashlib.sha256('\n'.join(sorted(self.words)).encode('utf-8')).hexdigest()
+        return self.digest
+
+    def memory_size(self):
+        """ Приблизительный объем памяти словаря и его индексов в байтах """
+        size = sys.getsizeof(self.words) + sum(map(sys.getsizeof, self.words))
+        index = self.index
+        size += (sys.getsizeof(index.words) + sys.getsizeof(index.text) +
+                 index.suffixes.itemsize * len(index.suffixes) + index.owners.itemsize * len(index.owners))
+        if self.letter_counts is not None:
+            counts, lengths = self.letter_counts
+            size += sum(map(sys.getsizeof, counts.values())) + sys.getsizeof(lengths)
+        return size
+
+    def get_letter_counts(self):
+        """
+        Матрица вхождений букв в слова индекса: пара (буква -> байтовая строка, длины слов).
+        Байт с номером слова равен числу вхождений буквы в слово или длине слова (не более 255).
+        """
+        if self.letter_counts is None:
+            words = self.index.words
+            letters = set(''.join(words))
+            counts = {letter: bytes(min(word.count(letter), 255) for word in words) for letter in letters}
+            lengths = bytes(min(len(word), 255) for word in words)
+            self.letter_counts = (counts, lengths)
+        return self.letter_counts
+
+    def restrict(self, letters, max_length):
+        """
+        Словарь слов, которые можно составить из букв letters (словарь буква -> количество)
+        длиной не более max_length.
+        Для небольшого словаря строится отдельный словарь со своими индексами. Иначе возвращается
+        этот словарь: отдельный индекс обошелся бы дороже, чем выигрыш при поиске, а лишние слова
+        все равно не встречаются на поле.
+        """
+        words = self.index.words
+        counts, lengths = self.get_letter_counts()
+        rows = [(lengths, max_length)] + [(row, letters.get(letter, 0)) for letter, row in counts.items()]
+
+        # Байты - признаки исключения слов; строки матрицы объединяются поразрядным ИЛИ над большими числами
+        excluded = 0
+        for row, limit in rows:
+            if limit < 255:
+                # Строка матрицы разделяемого словаря - memoryview; для bytes копия не создается
+                excluded |= int.from_bytes(bytes(row).translate(EXCLUSION_TABLES[limit]), 'big')
+        keep = excluded.to_bytes(len(words), 'big').translate(bytes([1]) + bytes(255))
+        if keep.count(1) * REBUILD_RATIO >= len(words):
+            return self
+
+        # Берутся только номера оставшихся слов: слова разделяемого словаря читаются из буфера по одному
+        return Lexicon([words[number] for number in compress(range(len(words)), keep)])
+
+    @classmethod
+    def load(cls, filename, cache=True, shared=False):
+        """
+        Загрузка словаря из текстового файла.
+        Скомпилированный словарь хранится рядом с исходным файлом и используется повторно,
+        пока не изменится время модификации или хеш исходного файла.
+        При shared возвращается SharedLexicon: индекс в плоском файле, отображаемом в память,
+        общий для всех процессов, которые загрузили тот же словарь.
+        """
+        if shared:
+            return SharedLexicon.load(filename, cache)
+        if not cache:
+            return cls(read_words(filename))
+
+        cache_file = filename + CACHE_SUFFIX
+        mtime = os.path.getmtime(filename)
+        source_hash = None
+        data = cls._read_cache(cache_file)
+        if data is not None:
+            if data['mtime'] == mtime:  # Файл не менялся с момента компиляции
+                return cls(data['words'], data['index'], data['letter_counts'])
+            source_hash = file_hash(filename)
+            if data['hash'] == source_hash:  # Время изменилось, а содержимое осталось прежним
+                cls._write_cache(cache_file, dict(data, mtime=mtime))
+                return cls(data['words'], data['index'], data['letter_counts'])
+
+        lexicon = cls(read_words(filename))
+        cls._write_cache(cache_file, {
+            'version': CACHE_VERSION,
+            'hash': source_hash or file_hash(filename),
+            'mtime': mtime,
+            'words': lexicon.index.words,
+            'index': lexicon.index,
+            'letter_counts': lexicon.get_letter_counts(),
+        })
+        return lexicon
+
+    @staticmethod
+    def _read_cache(cache_file):
+        """ Чтение скомпилированного словаря, None - если файла нет или он устарел """
+        try:
+            with open(cache_file, 'rb') as file:
+                data = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            return None
+        return data
+
+    @staticmethod
+    def _write_cache(cache_file, data):
+        """ Запись скомпилированного словаря; при ошибке записи словарь просто не кешируется """
+        try:
+            write_file_atomic(cache_file, [pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)])
+        except OSError:
+            pass
+
+
+# Расширение файла разделяемого индекса словаря и версия его формата
+SHARED_SUFFIX = '.index'
+SHARED_VERSION = 1
+
+# Заголовок файла разделяемого индекса: признак формата, версия, число слов, число суффиксов,
+# длина текста, длина алфавита в байтах UTF-8, время модификации исходного файла, хеш слов словаря
+SHARED_HEADER = struct.Struct('=4sIIIIId64s')
+SHARED_MAGIC = b'FWIX'
+
+# Код первой буквы алфавита в тексте индекса; коды меньше - для перевода строки
+FIRST_LETTER_CODE = 11
+
+
+def _aligned(offset):
+    """ Смещение, выровненное на размер элемента массивов индекса """
+    return -(-offset // 4) * 4
+
+
+class SharedWords:
+    """
+    Слова разделяемого индекса: последовательность, которая читает слова из буфера, не копируя его.
+    Проверка вхождения слова - двоичный поиск по отсортированным словам.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index.starts) - 1
+
+    def __getitem__(self, number):
+        starts = self.index.starts
+        return self.index.decode(self.index.text[starts[number]:starts[number + 1] - 1])
+
+    def __iter__(self):
+        index = self.index
+        return iter(index.decode(index.text[index.starts[0]:index.starts[-1] - 1]).split('\n')) if len(self) else iter(())
+
+    def __contains__(self, word):
+        encoded = self.index.encode(word) if isinstance(word, str) else None
+        if encoded is None:
+            return False
+        text, starts = self.index.text, self.index.starts
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text[starts[mid]:starts[mid + 1] - 1] < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < len(self) and text[starts[lo]:starts[lo + 1] - 1] == encoded
+
+
+class SharedIndex(SubstringIndex):
+    """
+    Индекс подстрок в файле, отображаемом в память только для чтения.
+    Буквы хранятся однобайтовыми кодами в порядке алфавита, поэтому порядок байтовых строк совпадает
+    с порядком слов, и поиск по суффиксному массиву идет прямо по буферу.
+    Процессы, открывшие один файл, делят одни и те же страницы памяти; при передаче в другой процесс
+    передается только путь к файлу.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, word_count, suffix_count, text_length, alphabet_length,
+         self.mtime, digest) = SHARED_HEADER.unpack_from(self.buffer)
+        if magic != SHARED_MAGIC or version != SHARED_VERSION:
+            raise ValueError(f'{path} - не файл индекса словаря версии {SHARED_VERSION}')
+        self.digest = digest.decode('ascii')
+
+        offset = SHARED_HEADER.size
+        self.alphabet = bytes(self.buffer[offset:offset + alphabet_length]).decode('utf-8')
+        offset += alphabet_length
+        decoding_table = ['\ufffe'] * 256
+        decoding_table[ord('\n')] = '\n'
+        for code, letter in enumerate(self.alphabet, FIRST_LETTER_CODE):
+            decoding_table[code] = letter
+        self.decoding_table = ''.join(decoding_table)
+        self.encoding_table = codecs.charmap_build(self.decoding_table)
+
+        # Начала слов и суффиксов - смещения от начала файла, поэтому текст индекса - сам буфер;
+        # срез отображения в память - байтовая строка, она сравнивается с закодированным фрагментом
+        self.text = self.buffer
+        view = memoryview(self.buffer)
+        offset = _aligned(offset + text_length)
+        self.starts = view[offset:offset + 4 * (word_count + 1)].cast('i')  # Начала слов в тексте
+        offset += 4 * (word_count + 1)
+        self.suffixes = view[offset:offset + 4 * suffix_count].cast('i')
+        offset += 4 * suffix_count
+        self.owners = view[offset:offset + 4 * suffix_count].cast('i')
+        offset += 4 * suffix_count
+        lengths = view[offset:offset + word_count]
+        offset += word_count
+        counts = {}
+        for letter in self.alphabet:
+            counts[letter] = view[offset:offset + word_count]
+            offset += word_count
+        self.letter_counts = (counts, lengths)
+        self.words = SharedWords(self)
+
+    def __reduce__(self):
+        return SharedIndex, (self.path,)
+
+    def encode(self, fragment):
+        """ Фрагмент в кодах индекса, None - если в нем есть буквы не из алфавита словаря """
+        try:
+            return codecs.charmap_encode(fragment, 'strict', self.encoding_table)[0]
+        except UnicodeEncodeError:
+            return None
+
+    def decode(self, data):
+        """ Строка из кодов индекса """
+        return codecs.charmap_decode(data, 'strict', self.decoding_table)[0]
+
+    def _bounds(self, fragment, lo=0, hi=None):
+        """ Границы диапазона суффиксов, начинающихся с фрагмента (см. SubstringIndex._bounds) """
+        encoded = self.encode(fragment)
+        if encoded is None:
+            return lo, lo
+        return SubstringIndex._bounds(self, encoded, lo, hi)
+
+    @staticmethod
+    def write(path, lexicon, mtime):
+        """
+        Запись индекса словаря в файл. ValueError - если в словаре больше букв, чем однобайтовых кодов.
+        Запись атомарна (write_file_atomic): процессы, уже открывшие прежний файл, продолжают работать с ним.
+        """
+        index = lexicon.index
+        alphabet = ''.join(sorted(set(index.text) - {'\n'}))
+        if FIRST_LETTER_CODE + len(alphabet) > 256:
+            raise ValueError('Слишком много разных букв для однобайтовых кодов')
+        encoding_table = {ord('\n'): '\n'}
+        for code, letter in enumerate(alphabet, FIRST_LETTER_CODE):
+            encoding_table[ord(letter)] = chr(code)
+        text = index.text.translate(encoding_table).encode('latin-1')
+
+        counts, lengths = lexicon.get_letter_counts()
+        alphabet_bytes = alphabet.encode('utf-8')
+        text_offset = SHARED_HEADER.size + len(alphabet_bytes)
+        starts = array('i', [text_offset])
+        for word in index.words:
+            starts.append(starts[-1] + len(word) + 1)
+
+        parts = [SHARED_HEADER.pack(SHARED_MAGIC, SHARED_VERSION, len(index.words), len(index.suffixes), len(text),
+                                    len(alphabet_bytes), mtime, lexicon.get_digest().encode('ascii')),
+                 alphabet_bytes, text]
+        size = text_offset + len(text)
+        parts.append(bytes(_aligned(size) - size))
+        suffixes = array('i', (position + text_offset for position in index.suffixes))
+        parts += [starts.tobytes(), suffixes.tobytes(), array('i', index.owners).tobytes(), bytes(lengths)]
+        parts += [bytes(counts.get(letter, bytes(len(index.words)))) for letter in alphabet]
+        write_file_atomic(path, parts)
+
+
+class SharedLexicon(Lexicon):
+    """
+    Словарь с индексом подстрок в разделяемом файле (SharedIndex).
+    Множество слов, индекс и матрица вхождений букв не копируются в память процесса, поэтому
+    пул процессов-обработчиков занимает в памяти примерно одну копию словаря.
+    Префиксное дерево по-прежнему строится в каждом процессе при первом обращении.
+    """
+
+    def __init__(self, index):
+        super().__init__((), index, index.letter_counts)
+        self.words = index.words
+        self.digest = index.digest
+
+    def __reduce__(self):
+        return SharedLexicon, (self.index,)
+
+    def memory_size(self):
+        """ Размер разделяемого файла: страницы файла общие для всех процессов """
+        return len(self.index.buffer)
+
+    @classmethod
+    def load(cls, filename, cache=True):
+        """
+        Загрузка словаря с разделяемым индексом. Файл индекса хранится рядом с исходным файлом
+        и строится заново, если исходный файл изменился. Если индекс нельзя записать,
+        возвращается обычный словарь.
+        """
+        path = filename + SHARED_SUFFIX
+        mtime = os.path.getmtime(filename)
+        try:
+            index = SharedIndex(path)
+            if index.mtime == mtime:
+                return cls(index)
+        except (OSError, ValueError, struct.error):
+            pass
+
+        lexicon = Lexicon.load(filename, cache)
+        try:
+            SharedIndex.write(path, lexicon, mtime)
+            return cls(SharedIndex(path))
+        except (OSError, ValueError):
+            return lexicon
+
+
+# Язык по умолчанию и файлы словарей известных языков
+DEFAULT_LANGUAGE = 'ru'
+LANGUAGE_FILES = {
+    'ru': 'russian_nouns.txt',
+}
+
+
+class LexiconRegistry:
+    """
+    Словари нескольких языков, загружаемые при первом обращении.
+    Словарь можно запросить по названию языка или по имени файла; все поля одного языка получают
+    один и тот же объект Lexicon. Если задан memory_limit (байты), после загрузки нового словаря
+    выгружаются давно не использованные, пока общий объем не уложится в ограничение.
+    Выгруженный словарь остается в памяти, пока на него ссылаются поля, и загружается снова при следующем обращении.
+    При shared словари загружаются с разделяемым индексом (SharedLexicon).
+    """
+
+    def __init__(self, languages=LANGUAGE_FILES, memory_limit=None, shared=False):
+        self.languages = dict(languages)  # Язык -> файл словаря
+        self.memory_limit = memory_limit
+        self.shared = shared
+        self.lexicons = OrderedDict()  # Файл словаря -> (словарь, объем памяти), в порядке использования
+
+    def register(self, language, filename):
+        """ Добавление языка; уже загруженный словарь прежнего файла языка не выгружается """
+        self.languages[language] = filename
+
+    def resolve(self, name):
+        """ Файл словаря для языка или имени файла """
+        return self.languages.get(name, name)
+
+    def add(self, name, lexicon):
+        """ Добавление уже загруженного словаря, например переданного из другого процесса """
+        filename = self.resolve(name)
+        self.lexicons[filename] = (lexicon, lexicon.memory_size())
+        self.lexicons.move_to_end(filename)
+        self._evict(keep=filename)
+
+    def get(self, name=DEFAULT_LANGUAGE):
+        """ Словарь языка или файла; при первом обращении загружается (FileNotFoundError, если файла нет) """
+        filename = self.resolve(name)
+        entry = self.lexicons.get(filename)
+        if entry is not None:
+            self.lexicons.move_to_end(filename)
+            return entry[0]
+        lexicon = Lexicon.load(filename, shared=self.shared)
+        self.add(filename, lexicon)
+        return lexicon
+
+    def is_loaded(self, name):
+        return self.resolve(name) in self.lexicons
+
+    def unload(self, name):
+        """ Выгрузка словаря языка или файла """
+        self.lexicons.pop(self.resolve(name), None)
+
+    def memory_size(self):
+        """ Приблизительный объем загруженных словарей в байтах """
+        return sum(size for _, size in self.lexicons.values())
+
+    def _evict(self, keep):
+        """ Выгрузка давно не использованных словарей сверх memory_limit, кроме словаря keep """
+        if self.memory_limit is None:
+            return
+        for filename in list(self.lexicons):
+            if self.memory_size() <= self.memory_limit:
+                break
+            if filename != keep:
+                del self.lexicons[filename]
+
+
+# Общий реестр словарей процесса
+LEXICONS = LexiconRegistry()
@@ -1,6 +1,19 @@
-from itertools import cycle
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import cycle, repeat
+import time
 from colorama import init, Fore, Style
 
+import exact_cover
+from lexicon import FragmentCache, LEXICONS, Lexicon, MIN_WORD_LENGTH
+from search_stats import SearchStats
+
+try:
+    import vector_search
+except ImportError:  # NumPy не установлен: векторный поиск недоступен
+    vector_search = None
+
 
 init()
 
@@ -14,14 +27,25 @@ WORD_COLORS = [Fore.RED, Fore.GREEN, Fore.YELLOW, Fore.BLUE, Fore.MAGENTA, Fore.
 COLOR_CYCLE = cycle(WORD_COLORS)
 
 
+# Направления поиска соседних ячеек
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Символы заблокированных ячеек в строках поля: на их месте ячейки нет
+BLOCKED_CELLS = '. '
+
+
 class Cell:
     """ Ячейка игрового поля """
 
-    def __init__(self, letter, x, y):
+    __slots__ = ('letter', 'x', 'y', 'index', 'bit', 'color')
+
+    def __init__(self, letter, x, y, index=0):
         self.letter = letter.lower()
         self.x = x
         self.y = y
-        self.color = DEFAULT_COLOR
+        self.index = index  # Номер ячейки на поле, номер ее бита в маске состояния поля
+        self.bit = 1 << index
+        self.color = DEFAULT_COLOR  # Цвет используется только при выводе поля
 
     def set_color(self, color):
         """ Установка цвета ячейки """
@@ -34,43 +58,120 @@ class Cell:
 class Board:
     """ Игровое поле """
 
-    def __init__(self, letter_rows, dictionary_file='russian_nouns.txt'):
-        """ Инициализация игрового поля """
-        self.grid = [[Cell(letter, x, y) for x, letter in enumerate(row)] for y, row in enumerate(letter_rows)]
-        self.dictionary = self.load_dictionary(dictionary_file)
-        self.width = len(letter_rows[0]) if letter_rows else 0
-        self.height = len(letter_rows)
-        self.existing_paths = set()  # множество кортежей координат ячеек проверяемых слов
+    def __init__(self, letter_rows, dictionary_file='russian_nouns.txt', lexicon=None, prefilter=False):
+        """
+        Инициализация игрового поля.
+        Поле может быть неправильной формы: символы BLOCKED_CELLS и места за концом коротких строк
+        означают заблокированные ячейки, в сетке поля на их месте None.
+        dictionary_file - файл словаря или название языка из реестра LEXICONS.
+        Уже загруженный словарь lexicon можно передать нескольким полям, чтобы не загружать его повторно.
+        При prefilter поиск идет по словам, которые можно составить из букв поля. Отбор слов стоит
+        10-40 мс на поле, больше, чем он экономит поиску на полях из benchmark.py, поэтому по умолчанию выключен.
+        """
+        self.letter_rows = list(letter_rows)
+        self.width = max(map(len, self.letter_rows), default=0)
+        self.height = len(self.letter_rows)
+        # Компактное представление поля для поиска: ячейки, буквы и соседи по номеру ячейки.
+        # Номера получают только настоящие ячейки, поэтому маски и таблицы не зависят от заблокированных
+        self.cells = []
+        self.grid = []
+        for y, row in enumerate(self.letter_rows):
+            grid_row = [None] * self.width
+            for x, letter in enumerate(row):
+                if letter not in BLOCKED_CELLS:
+                    grid_row[x] = Cell(letter, x, y, len(self.cells))
+                    self.cells.append(grid_row[x])
+            self.grid.append(grid_row)
+        self.letters = ''.join(cell.letter for cell in self.cells)
+        self.neighbors = [tuple(adjacent.index for dx, dy in DIRECTIONS
+                                if (adjacent := self.get_cell(cell.x + dx, cell.y + dy)))
+                          for cell in self.cells]
+        self.lexicon = lexicon if lexicon is not None else self.load_dictionary(dictionary_file)
+        # Словарь поля: слова, которым хватает букв поля и числа его ячеек
+        if prefilter:
+            letters = Counter(cell.letter for cell in self.cells)
+            self.candidates = self.lexicon.restrict(letters, len(self.cells))
+        else:
+            self.candidates = self.lexicon
+        self.dictionary = self.candidates.words
+        self.index = self.candidates.index  # Индекс подстрок словаря
+        self.fragments = FragmentCache(self.index)  # Кеш поиска фрагментов, общий для всех начальных ячеек
+        # Порядок ячеек при обходе поля в get_words (по столбцам): номер ячейки -> место в обходе.
+        # Каждый путь ищется только из своей первой по этому порядку ячейки
+        self.ranks = [0] * len(self.cells)
+        for rank, cell in enumerate(self.iter_cells()):
+            self.ranks[cell.index] = rank
+        self.full_mask = (1 << len(self.cells)) - 1  # Маска полностью заполненного поля
+        self.occupied = 0  # Маска ячеек, занятых подтвержденными словами
+        # Маски соседних ячеек: номер ячейки -> маска ее соседей
+        self.neighbor_masks = [sum(1 << n for n in adjacent) for adjacent in self.neighbors]
+        # Таблица смежности для расширения путей: номер ячейки -> пары (номер соседа, бит соседа)
+        self.adjacency = [tuple((n, 1 << n) for n in adjacent) for adjacent in self.neighbors]
 
     def load_dictionary(self, filename):
-        """ Загрузка словаря слов """
+        """ Словарь слов из общего реестра: файл или язык загружается один раз на все поля """
         try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                return set(word.strip().lower() for word in file if len(word.strip()) >= 3)
+            return LEXICONS.get(filename)
         except FileNotFoundError:
             print(f'Файл {filename} не найден.')
-            return set()
+            return Lexicon(set())
+
+    def get_trie(self):
+        """ Префиксное дерево словаря """
+        return self.candidates.get_trie()
+
+    def get_word_path(self, indices):
+        """ Слово на поле по кортежу номеров ячеек """
+        return WordPath(self, [self.cells[i] for i in indices])
 
     def get_cell(self, x, y):
         """ Получение ячейки по координатам """
         if 0 <= y < self.height and 0 <= x < self.width:
-            return self.grid[y][x]
+            return self.grid[y][x]  # None, если ячейка заблокирована
         return None  # Вывод, если ячейка находится за границами игрового поля
 
+    def iter_cells(self):
+        """ Генератор ячеек в порядке обхода поля по столбцам, заблокированные ячейки пропускаются """
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.grid[y][x] is not None:
+                    yield self.grid[y][x]
+
+    def free_regions(self, state):
+        """ Генератор масок связных областей свободных ячеек в состоянии state """
+        free = self.full_mask & ~state
+        while free:
+            region = frontier = free & -free  # Область растет от первой свободной ячейки
+            while frontier:
+                grown = 0
+                while frontier:
+                    lowest = frontier & -frontier
+                    grown |= self.neighbor_masks[lowest.bit_length() - 1]
+                    frontier ^= lowest
+                frontier = grown & free & ~region
+                region |= frontier
+            yield region
+            free &= ~region
+
     def display(self):
         """ Вывод игрового поля """
         for row in self.grid:
-            print(' '.join(cell.color + cell.letter.upper() + Style.RESET_ALL for cell in row))
+            print(' '.join(cell.color + cell.letter.upper() + Style.RESET_ALL if cell else ' ' for cell in row))
 
 
 class WordPath:
     """ Путь ячеек слова на игровом поле """
 
+    __slots__ = ('board', 'cells', 'dictionary', 'mask')
+
     def __init__(self, board, cells):
         """ Инициализация """
         self.board = board
         self.cells = cells
         self.dictionary = board.dictionary
+        self.mask = 0  # Маска ячеек слова
+        for cell in cells:
+            self.mask |= cell.bit
 
     def get_word(self):
         """ Возвращает строковое представление """
@@ -84,46 +185,6 @@ class WordPath:
         if word[::-1] in self.dictionary:
             return 2
 
-    def filter_dictionary(self):
-        """ Фильтрация словаря """
-        word = self.get_word()
-        self.dictionary = {w for w in self.dictionary if word in w or word[::-1] in w}
-
-    def get_adjacent_free_cells(self, begin=True):
-        """ Возвращает свободные соседние ячейки прилежащих к началу или к концу слову """
-        free_cells = []  # Список свободных ячеек
-        if not self.cells:
-            return free_cells
-        cell = self.cells[0] if begin else self.cells[
-            -1]  # Первая или последняя ячейка, вокруг которой ищутся свободные ячейки
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # Список направлений поиска свободных ячеек
-
-        for dx, dy in directions:
-            adjacent = self.board.get_cell(cell.x + dx, cell.y + dy)
-            if adjacent and adjacent.color == DEFAULT_COLOR and adjacent not in self.cells:
-                free_cells.append(adjacent)
-
-        return free_cells
-
-    def expand_paths(self):
-        """ Построение списка производных слов """
-        new_paths = []  # Список производных слов
-
-        for begin in [True, False]:  # Поиск свободных ячеек, прилежащих к началу или концу слова
-            free_cells = self.get_adjacent_free_cells(begin)  # Список свободных ячеек
-            for cell in free_cells:
-                # Добавление ячейки к слову с начала или с конца
-                new_cells = [cell] + self.cells if begin else self.cells + [cell]
-                path_tuple = tuple((c.x, c.y) for c in new_cells)  # Координаты кортежа ячеек
-                reverse_tuple = path_tuple[::-1]  # Координаты обратного кортежа ячеек
-
-                # Проверка уникальности кортежа ячеек в прямом и обратном направлении
-                if path_tuple not in self.board.existing_paths and reverse_tuple not in self.board.existing_paths:
-                    new_paths.append(WordPath(self.board, new_cells))  # Добавление производного слова
-                    self.board.existing_paths.add(path_tuple)  # Добавление уникального кортежа ячеек
-
-        return new_paths
-
     def fill_color(self, color):
         """ Заполняет все ячейки слова заданным цветом """
         for cell in self.cells:
@@ -134,91 +195,664 @@ class WordPath:
         for cell in self.cells:
             cell.set_color(DEFAULT_COLOR)
 
-    def is_free(self):
-        """ Проверяет, что все ячейки свободны """
-        return all(cell.color == DEFAULT_COLOR for cell in self.cells)
+    def is_free(self, state=None):
+        """ Проверяет, что все ячейки свободны в состоянии state (по умолчанию - текущее состояние поля) """
+        return not self.mask & (self.board.occupied if state is None else state)
 
     def __repr__(self):
         return f"WordPath('word={self.get_word()}, cells={self.cells})"
 
 
-def find_words(board, start_cells):
-    """ Поиск слов для заданной ячейки на игровом поле """
-    found_words = []  # Список найденных слов
+def canonical_path(path):
+    """ Путь в канонической ориентации: из двух направлений выбирается то, что начинается с меньшего номера ячейки """
+    return path if path[0] <= path[-1] else path[::-1]
+
 
-    path = WordPath(board, [start_cells])  # Создаем слово для начальной ячейки
-    paths = [path]  # включаем в список поисковых слов
+def iter_paths(board, start, stats=None):
+    """
+    Генератор слов для ячейки с номером start на игровом поле.
+    Ищутся только пути, в которых start - первая ячейка в порядке обхода поля (board.ranks):
+    путь с более ранней ячейкой находит поиск из нее, поэтому поиски из разных ячеек не пересекаются
+    и не требуют общего состояния.
+    Путь во время поиска - кортеж номеров ячеек, его слово и маска ячеек, объекты WordPath не создаются.
+    Кортежи номеров ячеек найденных слов выдаются сразу, как только слово найдено в словаре.
+    """
+    letters, adjacency, cells, occupied = board.letters, board.adjacency, board.cells, board.occupied
+    dictionary, fragments = board.dictionary, board.fragments
+    has_fragment = fragments.has_fragment
+    ranks, first = board.ranks, board.ranks[start]
+    if cells[start].bit & occupied:
+        first = -1  # Через занятую ячейку проходит только поиск из нее самой, ограничение порядка не нужно
+    seen = set()  # Построенные пути в канонической ориентации, только для этой ячейки
+    hits, misses = fragments.hits, fragments.misses
+
+    paths = [((start,), letters[start], cells[start].bit)]  # Список поисковых слов: (ячейки, слово, маска)
+
+    try:
+        while paths:  # список поисковых слов не пуст
+            path, word, mask = paths.pop()  # извлекаем слово из конца списка
+            if stats is not None:
+                stats.count('paths_popped')
+            # Игнорируем слова, которые содержат меньше 3 букв
+            if len(path) >= 3:
+                if stats is None:
+                    passed = has_fragment(word)
+                else:
+                    start_time = time.perf_counter()
+                    passed = has_fragment(word)
+                    stats.record_check(len(path), passed, time.perf_counter() - start_time)
+                if not passed:  # Если подходящих слов нет
+                    continue  # Переходим к началу цикла
+
+            # Проверка слова в прямом и обратном направлении
+            direction = 1 if word in dictionary else 2 if word[::-1] in dictionary else 0
+            if direction:
+                if direction == 2:  # Если слово содержится в словаре в обратном направлении, то переворачиваем путь
+                    path, word = path[::-1], word[::-1]
+                if stats is not None:
+                    stats.count('words_found')
+                yield path  # Выдаем найденное слово
+
+            # Расширяем путь с начала и с конца свободными соседними ячейками
+            blocked = occupied | mask
+            created = 0
+            for begin in (True, False):
+                for index, bit in adjacency[path[0] if begin else path[-1]]:
+                    if bit & blocked or ranks[index] < first:
+                        continue  # Ячейка занята или путь через нее найдет поиск из более ранней ячейки
+                    new_path = (index,) + path if begin else path + (index,)
+                    # Путь строится при поиске одним способом, хотя расширять его можно с разных концов
+                    key = canonical_path(new_path)
+                    if key not in seen:
+                        seen.add(key)
+                        new_word = letters[index] + word if begin else word + letters[index]
+                        paths.append((new_path, new_word, mask | bit))
+                        created += 1
+                    elif stats is not None:
+                        stats.count('paths_duplicate')  # Путь уже проверялся
+            if stats is not None:
+                stats.count('paths_created', created)
+    finally:  # Счетчики кеша учитываются, даже если потребитель прервал поиск
+        if stats is not None:
+            stats.count('fragment_cache_hits', fragments.hits - hits)
+            stats.count('fragment_cache_misses', fragments.misses - misses)
+
+
+def iter_paths_trie(board, start, stats=None):
+    """
+    Генератор слов, начинающихся в ячейке с номером start, по префиксному дереву словаря.
+    Слово, читаемое на поле в обратном направлении, находится из ячейки с его первой буквой,
+    поэтому путь достаточно расширять только с конца.
+    Путь, который читается словом в обоих направлениях, остается за концом, раньше идущим в обходе поля.
+    Кортежи номеров ячеек найденных слов выдаются сразу, как только слово найдено.
+    """
+    letters, adjacency, cells, ranks = board.letters, board.adjacency, board.cells, board.ranks
+    occupied, dictionary, trie = board.occupied, board.dictionary, board.get_trie()
+    # Обращение пути, который оканчивается в более ранней ячейке, уже найдено поиском из нее.
+    # Через занятую ячейку проходит только поиск из нее самой, поэтому для нее обращения не учитываются
+    first = -1 if cells[start].bit & occupied else ranks[start]
+
+    node = trie.root.get(letters[start])  # Узел дерева для первой буквы
+    if node is None:  # Ни одно слово не начинается с этой буквы
+        return
+    paths = [((start,), node, cells[start].bit)]  # Список поисковых слов: (ячейки, узел дерева, маска)
 
     while paths:  # список поисковых слов не пуст
-        current_path = paths.pop()  # извлекаем слово из конца списка
-        if len(current_path.cells) >= 3:  # Игнорируем слова, которые содержат меньше 3 букв
-            current_path.filter_dictionary()  # Обновляем множество подходящих слов
+        path, node, mask = paths.pop()  # извлекаем слово из конца списка
+        if stats is not None:
+            stats.count('paths_popped')
+
+        if trie.is_word(node):  # Путь образует слово словаря
+            # Путь, который читается словом в обоих направлениях, добавляется только один раз
+            if ranks[path[-1]] > first or ''.join(letters[i] for i in reversed(path)) not in dictionary:
+                if stats is not None:
+                    stats.count('words_found')
+                yield path  # Выдаем найденное слово
+            elif stats is not None:
+                stats.count('paths_duplicate')  # Слово уже найдено в обратном направлении
+
+        # Расширяем путь с конца только теми буквами, которые продолжают префикс слова словаря
+        blocked = occupied | mask
+        for index, bit in adjacency[path[-1]]:
+            if bit & blocked:
+                continue
+            next_node = node.get(letters[index])
+            if stats is not None:
+                stats.record_check(len(path) + 1, next_node is not None)
+            if next_node is not None:
+                paths.append((path + (index,), next_node, mask | bit))
+                if stats is not None:
+                    stats.count('paths_created')
+
+
+# Алгоритмы поиска слов: название -> (генератор кортежей номеров ячеек слов из одной ячейки,
+# необязательный поиск сразу из всех ячеек поля: номер ячейки -> кортежи номеров ячеек слов)
+SEARCH_ENGINES = {
+    'substring': (iter_paths, None),
+    'trie': (iter_paths_trie, None),
+}
+
+if vector_search is not None:
+    SEARCH_ENGINES['vector'] = (vector_search.iter_paths_vector, vector_search.find_board_paths)
+
+
+def find_words(board, start_cells, stats=None, engine='substring'):
+    """ Поиск слов для заданной ячейки на игровом поле алгоритмом engine """
+    stream, _ = SEARCH_ENGINES[engine]
+    return [board.get_word_path(path) for path in stream(board, start_cells.index, stats)]
+
+
+# Словарь и последнее игровое поле процесса-обработчика при параллельном поиске слов
+_worker_lexicon = None
+_worker_board = None
+
+
+def _init_worker(lexicon):
+    """ Словарь передается процессу-обработчику один раз при запуске пула """
+    global _worker_lexicon
+    _worker_lexicon = lexicon
+
+
+def _find_words_worker(letter_rows, occupied, engine, collect_stats, start):
+    """
+    Поиск слов для ячейки в процессе-обработчике; поле строится заново, только если оно сменилось.
+    Возвращает кортежи номеров ячеек найденных слов и, если нужно, статистику поиска в виде словаря.
+    """
+    global _worker_board
+    board = _worker_board
+    if board is None or board.letter_rows != letter_rows or board.occupied != occupied:
+        board = _worker_board = Board(letter_rows, lexicon=_worker_lexicon)
+        board.occupied = occupied
+    stats = SearchStats() if collect_stats else None
+    stream, _ = SEARCH_ENGINES[engine]
+    return list(stream(board, start, stats)), stats and stats.to_dict()
 
-        if not current_path.dictionary:  # Если множество подходящих слов пустое
-            continue  # Переходим к началу цикла
 
-        if directions := current_path.is_valid():  # Проверка слова в прямом и обратном направлении
-            if directions == 2:  # Если слова содержится в словаре в обратном направлении, то переворачиваем список ячеек
-                current_path.cells.reverse()
-            found_words.append(current_path)  # Добавим слово в список найденных слов
+class SearchPool:
+    """
+    Пул процессов для параллельного поиска слов, общий для всех полей с одним словарем.
+    Словарь передается обработчикам один раз при запуске пула, для каждой ячейки - только строки поля,
+    поэтому пул стоит создавать один раз и передавать в iter_words и get_words для всех полей.
+    """
 
-        paths.extend(current_path.expand_paths())  # Расширяем список поисковых слов
+    def __init__(self, lexicon, workers):
+        self.lexicon = lexicon
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(lexicon,))
 
-    return found_words
+    def close(self):
+        self.executor.shutdown()
 
+    def __enter__(self):
+        return self
 
-def get_words(board, progress=False):
-    """ Поиск всех слов на игровом поле"""
-    result = []
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_words(board, progress=False, engine='substring', pool=None, stats=None, budget=None):
+    """
+    Генератор всех слов на игровом поле: слова выдаются по мере нахождения в том же порядке, что и в get_words.
+    С пулом процессов pool (SearchPool) начальные ячейки распределяются между процессами, слова ячейки выдаются,
+    как только ее обработка закончена и выданы слова предыдущих ячеек.
+    Алгоритмы с поиском по всему полю (SEARCH_ENGINES) ищут слова сразу из всех ячеек, а выдают их так же, по ячейкам.
+    stats - необязательный сборщик статистики поиска (SearchStats); время фазы поиска не замеряется,
+    потому что между выдачей слов работает потребитель.
+    budget - необязательный FillBudget: когда время вышло, поиск прекращается перед следующей ячейкой
+    (budget.exhausted), выданные слова остаются.
+    """
+    if engine not in SEARCH_ENGINES:
+        raise ValueError(f'Неизвестный алгоритм поиска: {engine}')
+    if pool is not None:
+        yield from iter_words_parallel(board, progress, engine, pool, stats, budget)
+        return
+
+    stream, board_search = SEARCH_ENGINES[engine]
+    found = board_search(board, stats=stats, budget=budget) if board_search is not None else None
     for x in range(board.width):
         for y in range(board.height):
             start_cell = board.get_cell(x, y)  # Получение ячейки с заданными координатами
-            words = find_words(board, start_cell)  # Запуск функции Поиска слов на игровом поле
-            result.extend(words)
+            if budget is not None and budget.expired():
+                return
+            if start_cell is not None:  # Заблокированные ячейки пропускаются
+                # Запуск функции Поиска слов на игровом поле
+                paths = found[start_cell.index] if found is not None else stream(board, start_cell.index, stats)
+                for path in paths:
+                    yield board.get_word_path(path)
             if progress:  # Если нужно отразить прогресс работы функции
-                print('. ', end='')
+                print('. ' if start_cell else '  ', end='')
         if progress:  # Если нужно отразить прогресс работы функции
             print()
-    return result
 
 
-def backtracking_fill(board, word_paths):
+def get_words(board, progress=False, engine='substring', pool=None, stats=None):
+    """
+    Поиск всех слов на игровом поле.
+    С пулом процессов pool (SearchPool) начальные ячейки распределяются между процессами,
+    результат совпадает с последовательным.
+    Результат зависит от алгоритма: trie и vector выдают слово, которое читается в обе стороны, в другом
+    направлении и в другом порядке, чем substring (алгоритм по умолчанию). Пути vector те же, что у trie,
+    слова одной ячейки - по возрастанию длины.
+    stats - необязательный сборщик статистики поиска (SearchStats).
+    """
+    if engine not in SEARCH_ENGINES:
+        raise ValueError(f'Неизвестный алгоритм поиска: {engine}')
+
+    with stats.phase('search') if stats is not None else nullcontext():
+        return list(iter_words(board, progress, engine, pool, stats))
+
+
+def iter_words_parallel(board, progress, engine, pool, stats=None, budget=None):
+    """
+    Параллельный поиск слов в пуле процессов pool (SearchPool) со словарем поля.
+    Поиски из разных ячеек не пересекаются, поэтому результаты обработчиков
+    достаточно выдавать в порядке последовательного обхода.
+    """
+    if pool.lexicon is not board.lexicon:
+        raise ValueError('Словарь пула процессов не совпадает со словарем поля')
+    starts = list(board.iter_cells())
+    column_ends = {cell.x: cell for cell in starts}  # Последняя ячейка каждого столбца
+
+    found = pool.executor.map(_find_words_worker, repeat(board.letter_rows), repeat(board.occupied), repeat(engine),
+                              repeat(stats is not None), [cell.index for cell in starts])
+    try:
+        for start_cell, (paths, worker_stats) in zip(starts, found):
+            if budget is not None and budget.expired():
+                return
+            if stats is not None:
+                stats.merge(worker_stats)
+            for path_tuple in paths:
+                yield board.get_word_path(path_tuple)
+            if progress:  # Если нужно отразить прогресс работы функции
+                print('. ', end='')
+                if column_ends[start_cell.x] is start_cell:
+                    print()
+    finally:
+        found.close()  # Задачи, которые обработчики еще не начали, отменяются: пул остается свободным для других полей
+
+
+class WordBuckets:
+    """
+    Накопитель потока слов: слова раскладываются по длине и по ячейкам, которые они покрывают.
+    Слова генератора iter_words накапливаются по мере нахождения (extend).
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.by_length = {}  # Длина слова -> слова в порядке нахождения
+        self.by_cell = [[] for _ in board.cells]  # Номер ячейки -> слова, покрывающие ячейку
+        self.count = 0  # Число накопленных слов
+
+    def add(self, word_path):
+        """ Добавление слова """
+        self.by_length.setdefault(len(word_path.cells), []).append(word_path)
+        for cell in word_path.cells:
+            self.by_cell[cell.index].append(word_path)
+        self.count += 1
+
+    def extend(self, words):
+        """ Накопление всех слов потока """
+        for word_path in words:
+            self.add(word_path)
+        return self
+
+    def longest_first(self):
+        """ Слова в порядке убывания длины, слова одной длины - в порядке нахождения """
+        return [word_path for length in sorted(self.by_length, reverse=True) for word_path in self.by_length[length]]
+
+    def covering(self, cell):
+        """ Слова, покрывающие ячейку """
+        return self.by_cell[cell.index]
+
+    def __len__(self):
+        return self.count
+
+
+class FeasibilityCheck:
+    """
+    Проверка осуществимости ветви поиска с возвратом.
+    Ветвь отсекается, если есть связная область свободных ячеек меньше min_region
+    или свободная ячейка, которую не покрывает ни одно из оставшихся слов.
+    """
+
+    def __init__(self, min_region=MIN_WORD_LENGTH, regions=True, coverage=True):
+        self.min_region = min_region
+        self.regions = regions  # Проверять размеры связных областей
+        self.coverage = coverage  # Проверять покрытие свободных ячеек словами
+        self.checked = 0  # Число проверенных узлов
+        self.pruned_regions = 0  # Узлы, отсеченные из-за маленькой области
+        self.pruned_coverage = 0  # Узлы, отсеченные из-за непокрытой ячейки
+
+    @property
+    def pruned(self):
+        """ Общее число отсеченных узлов """
+        return self.pruned_regions + self.pruned_coverage
+
+    def __call__(self, board, state, word_paths):
+        """ True, если из состояния state словами word_paths еще можно заполнить поле """
+        self.checked += 1
+        if self.coverage:
+            covered = state
+            for word_path in word_paths:
+                covered |= word_path.mask
+            if covered != board.full_mask:
+                self.pruned_coverage += 1
+                return False
+        if self.regions:
+            for region in board.free_regions(state):
+                if bin(region).count('1') < self.min_region:
+                    self.pruned_regions += 1
+                    return False
+        return True
+
+    def __repr__(self):
+        return f'FeasibilityCheck(checked={self.checked}, pruned_regions={self.pruned_regions}, ' \
+               f'pruned_coverage={self.pruned_coverage})'
+
+
+# Время поиска заполнения в интерактивной программе, секунды
+FILL_TIME_LIMIT = 10
+
+# Время проверки на каждом ходе интерактивного заполнения (FillSession), секунды
+FILL_STEP_TIME = 0.05
+
+# Наибольшее число запоминаемых состояний, из которых поле заполнить нельзя
+DEAD_STATES_LIMIT = 1 << 17
+
+
+class FillBudget:
+    """
+    Ограничение поиска с возвратом по времени и числу узлов.
+    Пока поиск идет, запоминается лучшее частичное заполнение - набор слов, покрывающий больше всего ячеек.
+    """
+
+    def __init__(self, max_seconds=None, max_nodes=None):
+        self.max_seconds = max_seconds
+        self.max_nodes = max_nodes
+        self.deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        self.nodes = 0  # Число пройденных узлов
+        self.exhausted = False  # Бюджет исчерпан, поиск прерван
+        self.path = []  # Слова текущей ветви поиска
+        self.best = []  # Лучшее частичное заполнение
+        self.best_covered = 0  # Число ячеек, покрытых лучшим заполнением
+
+    def spend(self):
+        """ Учет очередного узла поиска; True, если бюджет исчерпан """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes or \
+                self.deadline is not None and time.perf_counter() > self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+    def expired(self):
+        """ Проверка времени без учета узла, например между этапами решения; True, если бюджет исчерпан """
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+    def record(self, word_path, covered):
+        """ Учет заполнения из слов текущей ветви и word_path, covered - число покрытых ими ячеек """
+        if covered > self.best_covered:
+            self.best = self.path + [word_path]
+            self.best_covered = covered
+
+    def push(self, word_path):
+        """ Слово добавлено в ветвь поиска """
+        self.path.append(word_path)
+
+    def pop(self):
+        """ Слово убрано из ветви поиска """
+        self.path.pop()
+
+    def __repr__(self):
+        return f'FillBudget(nodes={self.nodes}, exhausted={self.exhausted}, best_covered={self.best_covered})'
+
+
+def backtracking_fill(board, word_paths, state=None, check=None, stats=None, budget=None):
     """
     Поиск полного покрытия игрового поля с помощью алгоритма поиска с возвратом.
+    Состояние поля - маска занятых ячеек, по умолчанию берется из board.occupied.
+    check - необязательная проверка осуществимости (например, FeasibilityCheck),
+    вызывается после размещения каждого слова.
+    stats - необязательный сборщик статистики поиска (SearchStats).
+    budget - необязательное ограничение поиска (FillBudget); когда оно исчерпано, поиск возвращает None,
+    а лучшее частичное заполнение остается в budget.best.
     Возвращает итоговый список со словами или None.
     """
+    if state is None:  # Первый вызов, рекурсивные вызовы передают состояние явно
+        if stats is not None:
+            with stats.phase('fill'):
+                return backtracking_fill(board, word_paths, board.occupied, check, stats, budget)
+        state = board.occupied
+    if stats is not None:
+        stats.count('fill_nodes')
+    if budget is not None and budget.spend():
+        return None
 
     # Базовый случай
     # Проверяем, все ли ячейки заняты
-    if all(cell.color != DEFAULT_COLOR for row in board.grid for cell in row):
+    if state == board.full_mask:
         return []
 
     # Для каждого доступного слова (word_path) в списке word_paths.
     for i in range(len(word_paths)):
         word_path = word_paths[i]
 
-        word_path.fill_color(WORD_COLORS[1])  # Слово добавляется на поле
+        next_state = state | word_path.mask  # Слово добавляется на поле
+        if budget is not None:  # Заполнение учитывается, даже если дальше ветвь будет отсечена
+            budget.record(word_path, bin(next_state & ~board.occupied).count('1'))
         # Отбираются только те слова, которые можно разместить на оставшихся свободных ячейках.
-        next_word_paths = [wp for wp in word_paths[i + 1:] if wp.is_free()]
+        next_word_paths = [wp for wp in word_paths[i + 1:] if not wp.mask & next_state]
+        if check is not None and not check(board, next_state, next_word_paths):
+            if stats is not None:
+                stats.count('fill_pruned')
+            continue  # Из этого состояния поле заполнить нельзя
 
         # Рекурсивный вызов
-        result = backtracking_fill(board, next_word_paths)
+        if budget is None:
+            result = backtracking_fill(board, next_word_paths, next_state, check, stats)
+        else:
+            budget.push(word_path)
+            result = backtracking_fill(board, next_word_paths, next_state, check, stats, budget)
+            budget.pop()
+            if budget.exhausted:
+                return None  # Бюджет исчерпан, поиск прерывается
 
         # Проверка результата, если текущий выбор слова оказался неправильным
         if result is None:
-            word_path.reset_color()  # Слово убирается с поля
+            if stats is not None:
+                stats.count('fill_backtracks')
             continue  # Переходим к следующему слову
 
         # решение найдено
-        result = [word_path] + result
-        word_path.reset_color()  # Слово убирается с поля
-        return result
+        return [word_path] + result
 
     # Проверили все слова, но ни один не подошел
     return None
 
 
-def manual_fill_mode(board, word_paths):
+def anytime_fill(board, word_paths, max_seconds=None, max_nodes=None, check=None, stats=None):
+    """
+    Поиск с возвратом, ограниченный временем max_seconds и числом узлов max_nodes.
+    Возвращает тройку (слова, найдено ли покрытие, завершен ли поиск): полное покрытие, если оно найдено,
+    иначе лучшее найденное частичное заполнение. Если поиск завершен, а покрытия нет - поле заполнить нельзя.
+    """
+    budget = FillBudget(max_seconds, max_nodes)
+    solution = backtracking_fill(board, word_paths, check=check, stats=stats, budget=budget)
+    if solution is not None:
+        return solution, True, True
+    return budget.best, False, not budget.exhausted
+
+
+def exact_cover_fill(board, word_paths, stats=None, budget=None):
+    """
+    Поиск полного покрытия игрового поля как задачи точного покрытия (алгоритм X).
+    Возвращает итоговый список со словами в порядке word_paths или None.
+    budget - необязательный FillBudget: None при budget.exhausted значит, что решение не успели найти.
+    """
+    return next(iter_solutions(board, word_paths, limit=1, stats=stats, budget=budget), None)
+
+
+def iter_solutions(board, word_paths, limit=None, stats=None, budget=None):
+    """
+    Генератор всех полных покрытий игрового поля (алгоритм X).
+    Каждая свободная ячейка должна быть покрыта ровно одним словом, ветвление идет
+    по ячейке с наименьшим числом покрывающих ее слов.
+    Решения - списки слов в порядке word_paths - возвращаются по мере нахождения, не более limit штук.
+    stats - необязательный сборщик статистики; время между выдачей решений в фазу 'fill' не входит.
+    budget - необязательный FillBudget, ограничивающий время и число узлов поиска.
+    """
+    if limit is not None and limit <= 0:
+        return
+
+    # Строки задачи - свободные слова, столбцы - координаты свободных ячеек
+    rows = {i: [(c.x, c.y) for c in wp.cells] for i, wp in enumerate(word_paths) if wp.is_free()}
+    columns = exact_cover.build_columns(rows)
+    for cell in board.cells:
+        if not cell.bit & board.occupied and (cell.x, cell.y) not in columns:
+            return  # Ячейку не покрывает ни одно слово
+
+    solutions = exact_cover.solve(columns, rows, stats=stats, budget=budget)
+    count = 0
+    while count != limit:
+        with stats.phase('fill') if stats is not None else nullcontext():
+            solution = next(solutions, None)
+        if solution is None:
+            return
+        count += 1
+        yield [word_paths[i] for i in sorted(solution)]
+
+
+def count_solutions(board, word_paths, stats=None):
+    """
+    Подсчет числа полных покрытий игрового поля без построения самих решений.
+    Состояние поиска - маска занятых ячеек; число покрытий для каждого состояния запоминается.
+    """
+    # Маски свободных слов, покрывающих каждую ячейку: номер бита ячейки -> список масок
+    covering = {}
+    for word_path in word_paths:
+        if word_path.is_free():
+            for cell in word_path.cells:
+                covering.setdefault(cell.index, []).append(word_path.mask)
+
+    memo = {board.full_mask: 1}  # Заполненное поле - одно покрытие
+
+    def count(state):
+        if state in memo:
+            if stats is not None:
+                stats.count('fill_memo_hits')
+            return memo[state]
+        if stats is not None:
+            stats.count('fill_nodes')
+        free = board.full_mask & ~state
+        lowest = (free & -free).bit_length() - 1  # Первая свободная ячейка покрывается одним из слов
+        total = sum(count(state | mask) for mask in covering.get(lowest, ()) if not mask & state)
+        memo[state] = total
+        return total
+
+    with stats.phase('fill') if stats is not None else nullcontext():
+        return count(board.occupied)
+
+
+class FillSession:
+    """
+    Пошаговое заполнение поля с подсказками решателя.
+    Индекс слов по ячейкам строится один раз; состояния, из которых поле заполнить нельзя,
+    и найденный план заполнения сохраняются между ходами.
+    Проверка на каждом ходе ограничена временем max_seconds и числом узлов max_nodes (FillBudget):
+    если решатель не уложился, ответ неизвестен, а не блокирует ход.
+    """
+
+    def __init__(self, board, word_paths, max_seconds=FILL_STEP_TIME, max_nodes=None):
+        self.board = board
+        self.word_paths = list(word_paths)
+        self.masks = [word_path.mask for word_path in self.word_paths]
+        self.covering = [[] for _ in board.cells]  # Номер ячейки -> номера покрывающих ее слов
+        for i, word_path in enumerate(self.word_paths):
+            for cell in word_path.cells:
+                self.covering[cell.index].append(i)
+        self.state = board.occupied  # Маска занятых ячеек
+        self.placed = []  # Номера размещенных слов
+        self.max_seconds = max_seconds
+        self.max_nodes = max_nodes
+        # Состояния, из которых поле заполнить нельзя; при переполнении вытесняются самые старые
+        self.dead = OrderedDict()
+        self.plan = None  # Номера слов, заполняющих поле из текущего состояния, если план известен
+
+    def _solve(self, state, budget):
+        """ Номера слов, заполняющих поле из состояния state, или None (в том числе, если бюджет исчерпан) """
+        if state == self.board.full_mask:
+            return []
+        if state in self.dead:
+            return None
+        if budget.spend():
+            return None
+
+        # Первая свободная ячейка покрывается одним из слов: одно и то же состояние достигается
+        # одним набором слов, поэтому запомненные тупики отсекают повторы
+        free = self.board.full_mask & ~state
+        lowest = (free & -free).bit_length() - 1
+        for i in self.covering[lowest]:
+            if self.masks[i] & state:
+                continue
+            rest = self._solve(state | self.masks[i], budget)
+            if rest is not None:
+                return [i] + rest
+            if budget.exhausted:
+                return None  # Ответ неизвестен, состояние тупиком не считается
+
+        self.dead[state] = True
+        if len(self.dead) > DEAD_STATES_LIMIT:
+            self.dead.popitem(last=False)
+        return None
+
+    def can_complete(self):
+        """ Можно ли заполнить поле из текущего состояния: True, False или None, если решатель не уложился в бюджет """
+        if self.plan is None and self.state not in self.dead:
+            budget = FillBudget(self.max_seconds, self.max_nodes)
+            self.plan = self._solve(self.state, budget)
+            if self.plan is None and budget.exhausted:
+                return None
+        return self.plan is not None
+
+    def next_word(self):
+        """ Слово, с которым поле можно заполнить до конца, или None (в том числе, если ответ неизвестен) """
+        if not self.can_complete() or not self.plan:
+            return None
+        return self.word_paths[self.plan[0]]
+
+    def candidates(self):
+        """ Слова, которые еще можно разместить на поле """
+        return [word_path for word_path in self.word_paths if not word_path.mask & self.state]
+
+    def place(self, word_path):
+        """ Размещение слова на поле """
+        i = self.word_paths.index(word_path)
+        if self.masks[i] & self.state:
+            raise ValueError(f'Слово {word_path.get_word()} пересекается с уже размещенными словами')
+        self.state |= self.masks[i]
+        self.placed.append(i)
+        if self.plan is not None and i in self.plan:  # Остаток плана по-прежнему заполняет поле
+            self.plan = [j for j in self.plan if j != i]
+        else:
+            self.plan = None
+
+    def undo(self):
+        """ Отмена последнего размещенного слова """
+        i = self.placed.pop()
+        self.state &= ~self.masks[i]
+        self.plan = None
+
+
+def manual_fill_mode(board, word_paths, placed=()):
+    """ Интерактивное заполнение поля; placed - уже размещенные слова, например частичное заполнение решателя """
+    session = FillSession(board, word_paths)  # Решатель, который продолжает работу после каждого хода
+    for placed_path in placed:
+        placed_path.fill_color(next(COLOR_CYCLE))
+        board.occupied |= placed_path.mask
+        session.place(placed_path)
+    word_paths = session.candidates()
+    word_path = None
     i = 0  # Начинаем с первого слова
     color = next(COLOR_CYCLE)  # Устанавливаем новый цвет букв
 
@@ -234,20 +868,34 @@ def manual_fill_mode(board, word_paths):
         # Запрос на совпадении слова
         result = input("\nСлово подходит (y/n): ").strip().lower()
         if result[0] in ('y', 'д'):
+            board.occupied |= word_path.mask  # Слово занимает ячейки поля
+            session.place(word_path)
             color = next(COLOR_CYCLE)  # Переходим к следующему цвету
             # Отбираются только те слова, которые можно разместить на оставшихся свободных ячейках.
-            word_paths = [wp for wp in word_paths[1:] if wp.is_free()]
+            word_paths = session.candidates()
             i = 0  # Сбрасываем счетчик
 
             # Если список подходящих слов пуст
             if not word_paths:
                 print('\nНет подходящих слов для заполнения')
                 return None
+
+            # Подсказка решателя: слово, с которым поле заполняется до конца, проверяется первым
+            completable = session.can_complete()
+            if completable and (hint := session.next_word()):
+                print(f'Подсказка: поле можно заполнить, продолжив словом {hint.get_word().upper()}')
+                word_paths.remove(hint)
+                word_paths.insert(0, hint)
+            elif completable is None:
+                print('Подсказка: решатель не успел проверить, можно ли заполнить поле до конца')
+            else:
+                print('Подсказка: из текущего положения поле полностью заполнить нельзя')
         else:
             word_path.reset_color()  # Убираем слово с поля
             i += 1  # переходим к следующему слову в списке
 
-    word_path.reset_color()  # убираем слово с поля
+    if word_path is not None and word_path.mask & ~board.occupied:
+        word_path.reset_color()  # убираем слово с поля
     print('\nИтоговое поле:')
     board.display()
 
@@ -270,14 +918,13 @@ if __name__ == '__main__':
     print('Игровое поле:')
     board.display()
 
-    words = get_words(board)
-    # Сортируем слова в порядке убывания их длины
-    words = [word for word in sorted(words, key=lambda x: (-len(x.get_word(), )))]
+    # Слова раскладываются по длине по мере нахождения и берутся в порядке убывания длины
+    words = WordBuckets(board).extend(iter_words(board)).longest_first()
 
-    # Ищем решение
-    solution = backtracking_fill(board, words)
+    # Ищем решение, но не дольше FILL_TIME_LIMIT секунд; проверка осуществимости отсекает тупиковые ветви
+    solution, solved, complete = anytime_fill(board, words, max_seconds=FILL_TIME_LIMIT, check=FeasibilityCheck())
 
-    if solution:  # Если решение найдено
+    if solved:  # Если решение найдено
         # Выводим результат
         print('\nИгровое поле можно заполнить следующими словами:')
         for word_path in solution:
@@ -289,7 +936,12 @@ if __name__ == '__main__':
         print("\nРешение:")
         board.display()
     else:
-        result = input(
-            "\nИгровое поле заполнить не удалось. Продолжить в интерактивном режиме? (y/n): ").strip().lower()
+        if complete:
+            print('\nИгровое поле найденными словами заполнить нельзя.')
+        else:
+            print(f'\nРешение не найдено за {FILL_TIME_LIMIT} с.')
+        if solution:
+            print('Лучшее частичное заполнение: ' + ', '.join(word_path.get_word() for word_path in solution))
+        result = input("Продолжить в интерактивном режиме? (y/n): ").strip().lower()
         if result[0] in ('y', 'д'):
-            manual_fill_mode(board, words)
+            manual_fill_mode(board, words, placed=solution)  # Начинаем с частичного заполнения
@@ -0,0 +1,84 @@
+import cProfile
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class SearchStats:
+    """
+    Статистика поиска слов и заполнения поля.
+    Передается в функции поиска параметром stats; без него статистика не собирается.
+    """
+
+    def __init__(self, profile=False):
+        """ При profile фазы поиска дополнительно выполняются под cProfile """
+        self.counters = Counter()  # Счетчики событий: имя -> число
+        self.depths = {}  # Проверки кандидатов по длине пути: длина -> счетчики
+        self.phases = Counter()  # Время фаз в секундах: имя -> время
+        self.profiler = cProfile.Profile() if profile else None
+
+    def count(self, name, number=1):
+        """ Увеличение счетчика """
+        self.counters[name] += number
+
+    def record_check(self, depth, passed, elapsed=0.0):
+        """ Учет проверки пути длины depth по словарю: прошел ли путь проверку и сколько она длилась """
+        record = self.depths.get(depth)
+        if record is None:
+            record = self.depths[depth] = {'checks': 0, 'pruned': 0, 'time': 0.0}
+        record['checks'] += 1
+        record['pruned'] += not passed
+        record['time'] += elapsed
+
+    def record_checks(self, depth, checks, pruned, elapsed=0.0):
+        """ Учет сразу нескольких проверок путей длины depth: всего checks, из них не прошли pruned """
+        record = self.depths.get(depth)
+        if record is None:
+            record = self.depths[depth] = {'checks': 0, 'pruned': 0, 'time': 0.0}
+        record['checks'] += checks
+        record['pruned'] += pruned
+        record['time'] += elapsed
+
+    @contextmanager
+    def phase(self, name):
+        """ Замер времени фазы поиска """
+        if self.profiler is not None:
+            self.profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] += time.perf_counter() - start
+            if self.profiler is not None:
+                self.profiler.disable()
+
+    def merge(self, data):
+        """ Добавление статистики, полученной через to_dict (например, из другого процесса) """
+        self.counters.update(data['counters'])
+        self.phases.update(data['phases'])
+        for depth, other in data['depths'].items():
+            record = self.depths.setdefault(int(depth), {'checks': 0, 'pruned': 0, 'time': 0.0})
+            for key, value in other.items():
+                record[key] += value
+
+    def to_dict(self):
+        """ Статистика в виде словаря """
+        return {
+            'counters': dict(self.counters),
+            'depths': {depth: dict(record) for depth, record in sorted(self.depths.items())},
+            'phases': dict(self.phases),
+        }
+
+    def to_json(self, **kwargs):
+        """ Статистика в формате JSON """
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+    def dump_profile(self, filename):
+        """ Сохранение профиля в формате cProfile (читается pstats и snakeviz) """
+        if self.profiler is None:
+            raise ValueError('Статистика собрана без профилирования (profile=False)')
+        self.profiler.dump_stats(filename)
+
+    def __repr__(self):
+        return f'SearchStats({self.to_dict()})'
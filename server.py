@@ -0,0 +1,306 @@
+"""
+Сервер решения игровых полей: HTTP/JSON поверх asyncio.
+
+Словарь загружается один раз при запуске, обработчики открывают его разделяемый индекс (SharedLexicon),
+поэтому время ответа складывается только из поиска слов и заполнения поля, а память под словарь
+не растет с числом обработчиков.
+Словари других языков (--language en=english_nouns.txt) обработчики загружают при первом запросе
+на этом языке и выгружают давно не использованные, если словари не помещаются в --lexicon-memory.
+
+    python server.py --port 8080 --workers 4
+    curl -d '{"rows": ["рило", "кавт", "эрай", "хола"]}' http://127.0.0.1:8080/solve
+
+Запросы:
+    POST /solve   {"rows": [...], "engine": "substring", "language": "ru", "timeout": 10} -> результат как в batch.py
+                  (timeout - не больше --timeout; поле, не решенное вовремя, - ответ 504)
+    GET  /health  -> состояние сервера
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from batch import _init_worker, _solve_worker
+from lexicon import LANGUAGE_FILES, Lexicon, LexiconRegistry
+from part_3_3 import BLOCKED_CELLS
+from solution_cache import SOLUTION_CACHE_SIZE
+
+
+# Сообщения для кодов ответа
+HTTP_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+
+# Наибольший размер тела запроса в байтах
+MAX_BODY_SIZE = 1 << 16
+
+# Наибольшее число ячеек поля в запросе: поиск слов на большем поле не укладывается в разумное время ответа
+MAX_BOARD_CELLS = 400
+
+
+class HTTPError(Exception):
+    """ Ошибка обработки запроса с кодом ответа """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SolverService:
+    """
+    Очередь запросов к пулу процессов-обработчиков.
+    Одновременно решается не больше concurrency полей, еще не больше queue_size ждут в очереди;
+    остальным запросам сразу возвращается 503.
+    Обработчик получает срок ответа и сам прекращает решение к этому сроку, поэтому поле,
+    не решенное вовремя, не занимает обработчик дольше отведенного времени.
+    """
+
+    def __init__(self, lexicon, workers=None, concurrency=None, queue_size=64, timeout=30.0,
+                 cache_size=0, cache_dir=None, registry=None):
+        self.workers = workers or os.cpu_count() or 1
+        # Обработчики запускаются не копией сервера: иначе они унаследуют открытые соединения клиентов
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=context,
+                                            initializer=_init_worker,
+                                            initargs=(lexicon, cache_size, cache_dir, registry))
+        self.slots = asyncio.Semaphore(concurrency or self.workers)  # Свободные места для решения
+        self.queue_size = queue_size
+        self.timeout = timeout  # Время ответа по умолчанию, секунды
+        self.queued = 0  # Запросы, ожидающие места
+        self.active = 0  # Поля в работе
+        self.served = 0  # Решенные поля
+        self.timed_out = 0  # Запросы, не уложившиеся во время
+        self.tasks = set()  # Незавершенные задачи пула
+
+    async def start(self):
+        """ Запуск всех процессов-обработчиков заранее, чтобы первые запросы не ждали загрузки словаря """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, os.getpid) for _ in range(self.workers)))
+
+    async def solve(self, board_id, rows, engine='substring', timeout=None, language=None):
+        """ Решение поля в пуле процессов с ограничением времени ответа (не больше self.timeout) """
+        if self.queued >= self.queue_size:
+            raise HTTPError(503, 'Очередь запросов заполнена')
+
+        self.queued += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.queued -= 1
+
+        loop = asyncio.get_running_loop()
+        timeout = min(timeout or self.timeout, self.timeout)
+        self.active += 1
+        task = self.executor.submit(_solve_worker, board_id, rows, engine, language, time.time() + timeout)
+        self.tasks.add(task)
+        # Место освобождается, когда задача пула завершена: обработчик вернул результат или задачу сняли
+        # с очереди до начала решения. Обратный вызов выполняется в служебном потоке пула
+        task.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, task))
+        try:
+            # Отмена ожидания (время вышло, клиент отключился) снимает задачу с очереди пула,
+            # если обработчик еще не начал решение; начатое решение обработчик прервет сам к сроку
+            result = await asyncio.wait_for(asyncio.wrap_future(task), timeout)
+        except asyncio.TimeoutError:
+            result = {'timed_out': True}
+        if result.get('timed_out'):
+            self.timed_out += 1
+            raise HTTPError(504, 'Поле не решено за отведенное время')
+        self.served += 1
+        return result
+
+    def _release(self, task):
+        """ Освобождение места после завершения решения """
+        self.tasks.discard(task)
+        self.active -= 1
+        self.slots.release()
+
+    def health(self):
+        """ Состояние сервиса """
+        return {'status': 'ok', 'workers': self.workers, 'active': self.active, 'queued': self.queued,
+                'served': self.served, 'timed_out': self.timed_out}
+
+    def close(self):
+        """
+        Остановка пула: задачи, которые обработчики еще не начали, отменяются (cancel_futures есть только
+        с Python 3.9), начатые решения завершаются не позже своего срока ответа.
+        """
+        for task in list(self.tasks):
+            task.cancel()
+        self.executor.shutdown(wait=True)
+
+
+async def read_request(reader):
+    """ Чтение HTTP-запроса: (метод, путь, тело) """
+    request_line = await reader.readline()
+    if not request_line:
+        raise ConnectionError('Соединение закрыто')
+    try:
+        method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, 'Неверная строка запроса') from None
+
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0) or 0)
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(413, 'Слишком большой запрос')
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path, body
+
+
+def write_response(writer, status, data):
+    """ Запись JSON-ответа """
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    head = (f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}\r\n'
+            f'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n')
+    writer.write(head.encode('latin-1') + body)
+
+
+async def route(service, method, path, body):
+    """ Обработка запроса, возвращает (код ответа, данные) """
+    if path == '/health':
+        if method != 'GET':
+            raise HTTPError(405, 'Ожидается GET')
+        return 200, service.health()
+
+    if path == '/solve':
+        if method != 'POST':
+            raise HTTPError(405, 'Ожидается POST')
+        try:
+            request = json.loads(body or b'{}')
+            rows = request['rows']
+        except (ValueError, KeyError, TypeError):
+            raise HTTPError(400, 'Ожидается JSON-объект с полем rows') from None
+        if not isinstance(rows, list) or not all(isinstance(row, str) for row in rows):
+            raise HTTPError(400, 'rows - список строк поля')
+        if sum(letter not in BLOCKED_CELLS for row in rows for letter in row) > MAX_BOARD_CELLS:
+            raise HTTPError(413, f'На поле больше {MAX_BOARD_CELLS} ячеек')
+        engine = request.get('engine', 'substring')
+        if not isinstance(engine, str):
+            raise HTTPError(400, 'engine - название алгоритма поиска')
+        language = request.get('language')
+        if language is not None and not isinstance(language, str):
+            raise HTTPError(400, 'language - название языка')
+        timeout = request.get('timeout', service.timeout)
+        # bool - подкласс int; NaN не проходит сравнение
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not timeout > 0:
+            raise HTTPError(400, 'timeout - положительное число секунд')
+        timeout = min(timeout, service.timeout)  # Больше времени, чем задано при запуске сервера, не дается
+        result = await service.solve(request.get('id'), rows, engine, timeout, language)
+        return (400 if 'error' in result else 200), result
+
+    raise HTTPError(404, f'Неизвестный адрес {path}')
+
+
+async def handle_connection(service, reader, writer):
+    """ Обработка одного соединения: один запрос - один ответ """
+    try:
+        try:
+            method, path, body = await read_request(reader)
+            status, data = await route(service, method, path, body)
+        except HTTPError as error:
+            status, data = error.status, {'error': str(error)}
+        except ValueError as error:  # Например, неизвестный алгоритм поиска
+            status, data = 400, {'error': str(error)}
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as error:  # Непредвиденная ошибка не должна оставлять клиента без ответа
+            status, data = 500, {'error': f'{type(error).__name__}: {error}'}
+        write_response(writer, status, data)
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass  # Клиент закрыл соединение
+    finally:
+        writer.close()
+
+
+async def serve(service, host='127.0.0.1', port=8080, unix=None):
+    """ Запуск сервера на TCP-порту или Unix-сокете """
+    await service.start()
+    handler = partial(handle_connection, service)
+    if unix:
+        server = await asyncio.start_unix_server(handler, path=unix)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+async def request(method, path, data=None, host='127.0.0.1', port=8080, unix=None):
+    """ Простой клиент для проверки сервера: возвращает (код ответа, данные) """
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8') if data is not None else b''
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n'
+                 .encode('latin-1') + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    payload = await reader.readexactly(length)
+    writer.close()
+    return int(status_line.split()[1]), json.loads(payload)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Сервер решения полей Fillwords')
+    parser.add_argument('--host', default='127.0.0.1', help='адрес для TCP')
+    parser.add_argument('--port', type=int, default=8080, help='порт для TCP')
+    parser.add_argument('--unix', help='путь к Unix-сокету вместо TCP')
+    parser.add_argument('--dictionary', default='russian_nouns.txt', help='файл словаря')
+    parser.add_argument('--workers', type=int, help='число процессов-обработчиков')
+    parser.add_argument('--concurrency', type=int, help='число одновременно решаемых полей')
+    parser.add_argument('--queue', type=int, default=64, help='наибольшая длина очереди запросов')
+    parser.add_argument('--timeout', type=float, default=30.0, help='время ответа по умолчанию, секунды')
+    parser.add_argument('--cache-size', type=int, default=SOLUTION_CACHE_SIZE,
+                        help='число решений в кеше каждого обработчика, 0 - без кеша')
+    parser.add_argument('--cache-dir', help='каталог кеша решений на диске')
+    parser.add_argument('--language', action='append', default=[], metavar='ЯЗЫК=ФАЙЛ',
+                        help='словарь языка, загружаемый при первом запросе; можно указать несколько раз')
+    parser.add_argument('--lexicon-memory', type=float,
+                        help='наибольший объем словарей языков в памяти обработчика, МБ')
+    args = parser.parse_args(argv)
+
+    lexicon = Lexicon.load(args.dictionary, shared=True)
+    languages = dict(LANGUAGE_FILES)
+    for option in args.language:
+        language, separator, filename = option.partition('=')
+        if not separator:
+            parser.error(f'--language ожидает ЯЗЫК=ФАЙЛ, получено {option}')
+        languages[language] = filename
+    memory_limit = args.lexicon_memory * 2 ** 20 if args.lexicon_memory is not None else None
+    registry = LexiconRegistry(languages, memory_limit, shared=True)
+    registry.add(args.dictionary, lexicon)  # Язык словаря по умолчанию не загружается повторно
+
+    async def run():
+        service = SolverService(lexicon, args.workers, args.concurrency, args.queue, args.timeout,
+                                args.cache_size, args.cache_dir, registry)
+        try:
+            await serve(service, args.host, args.port, args.unix)
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
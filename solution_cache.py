@@ -0,0 +1,173 @@
+"""
+Кеш результатов решения игровых полей.
+
+Ключ - хеш канонической формы поля, хеш словаря и алгоритм поиска слов: алгоритмы выдают слова
+в разном направлении и порядке, а от порядка слов зависит выбранное заполнение. Каноническая форма - наименьшая
+из восьми форм поля, полученных поворотами и отражениями, поэтому повернутое или отраженное
+поле находит в кеше результат исходного. Результат хранится в номерах ячеек канонического поля
+и при выдаче переводится в номера ячеек запрошенного поля.
+
+Кеш двухуровневый: LRU-кеш в памяти и необязательный каталог на диске, по файлу на поле.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from lexicon import write_file_atomic
+from part_3_3 import BLOCKED_CELLS
+
+
+# Версия формата записей кеша, входит в ключ
+SOLUTION_CACHE_VERSION = 2
+
+# Наибольшее число результатов в памяти
+SOLUTION_CACHE_SIZE = 1024
+
+# Символ заблокированной ячейки в канонической форме поля
+BLOCKED = '.'
+
+# Преобразования симметрии прямоугольника: (x, y, ширина, высота) -> (x, y) в преобразованном поле.
+# У преобразований с номерами из TRANSPOSING ширина и высота меняются местами
+SYMMETRIES = [
+    lambda x, y, w, h: (x, y),  # Без изменений
+    lambda x, y, w, h: (h - 1 - y, x),  # Поворот на 90 градусов
+    lambda x, y, w, h: (w - 1 - x, h - 1 - y),  # Поворот на 180 градусов
+    lambda x, y, w, h: (y, w - 1 - x),  # Поворот на 270 градусов
+    lambda x, y, w, h: (w - 1 - x, y),  # Отражение слева направо
+    lambda x, y, w, h: (x, h - 1 - y),  # Отражение сверху вниз
+    lambda x, y, w, h: (y, x),  # Отражение относительно главной диагонали
+    lambda x, y, w, h: (h - 1 - y, w - 1 - x),  # Отражение относительно побочной диагонали
+]
+TRANSPOSING = {1, 3, 6, 7}
+
+
+def normalize_rows(rows):
+    """ Строки поля одинаковой длины, заблокированные ячейки - BLOCKED """
+    width = max(map(len, rows), default=0)
+    return [''.join(BLOCKED if letter in BLOCKED_CELLS else letter for letter in row.ljust(width, BLOCKED))
+            for row in rows]
+
+
+def transform_rows(rows, symmetry):
+    """ Строки поля после преобразования симметрии (строки должны быть нормализованы) """
+    height, width = len(rows), len(rows[0]) if rows else 0
+    new_width, new_height = (height, width) if symmetry in TRANSPOSING else (width, height)
+    grid = [[BLOCKED] * new_width for _ in range(new_height)]
+    transform = SYMMETRIES[symmetry]
+    for y, row in enumerate(rows):
+        for x, letter in enumerate(row):
+            new_x, new_y = transform(x, y, width, height)
+            grid[new_y][new_x] = letter
+    return [''.join(row) for row in grid]
+
+
+def canonical_form(rows):
+    """ Каноническая форма поля: пара (строки, номер преобразования симметрии, которое к ней приводит) """
+    rows = normalize_rows(rows)
+    return min((transform_rows(rows, symmetry), symmetry) for symmetry in range(len(SYMMETRIES)))
+
+
+def cell_positions(rows):
+    """ Координаты ячеек с буквами в порядке их номеров на поле (как в Board) """
+    return [(x, y) for y, row in enumerate(rows) for x, letter in enumerate(row) if letter not in BLOCKED_CELLS]
+
+
+class SolutionCache:
+    """
+    Кеш найденных слов и заполнений полей для одного словаря.
+    Записи - пары (слова, заполнение): слова - кортежи номеров ячеек, заполнение - номера слов
+    в списке слов или None, если поле заполнить нельзя.
+    """
+
+    def __init__(self, lexicon, maxsize=SOLUTION_CACHE_SIZE, directory=None):
+        self.digest = lexicon.get_digest()
+        self.maxsize = maxsize
+        self.directory = directory  # Каталог для записей на диске, None - только память
+        self.entries = OrderedDict()  # Ключ -> запись в номерах ячеек канонического поля
+        self.hits = 0
+        self.disk_hits = 0  # Обращения, найденные только на диске
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, rows, engine):
+        """ Ключ поля для алгоритма поиска engine и перевод номеров ячеек поля в номера ячеек канонического поля """
+        normalized = normalize_rows(rows)
+        canonical, symmetry = canonical_form(normalized)
+        key = hashlib.sha256(f'{SOLUTION_CACHE_VERSION}\n{self.digest}\n{engine}\n'.encode('utf-8') +
+                             '\n'.join(canonical).encode('utf-8')).hexdigest()
+
+        height, width = len(normalized), len(normalized[0]) if normalized else 0
+        canonical_index = {position: index for index, position in enumerate(cell_positions(canonical))}
+        transform = SYMMETRIES[symmetry]
+        to_canonical = [canonical_index[transform(x, y, width, height)] for x, y in cell_positions(normalized)]
+        return key, to_canonical
+
+    def get(self, rows, engine):
+        """ Запись для поля и алгоритма поиска engine в номерах ячеек поля или None """
+        key, to_canonical = self.key(rows, engine)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        else:
+            entry = self._read(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+
+        from_canonical = [0] * len(to_canonical)
+        for index, canonical in enumerate(to_canonical):
+            from_canonical[canonical] = index
+        words, solution = entry
+        return [tuple(from_canonical[i] for i in path) for path in words], solution
+
+    def put(self, rows, engine, words, solution):
+        """
+        Сохранение записи для поля и алгоритма поиска engine:
+        words - кортежи номеров ячеек поля, solution - номера слов или None.
+        """
+        key, to_canonical = self.key(rows, engine)
+        entry = ([tuple(to_canonical[i] for i in path) for path in words],
+                 None if solution is None else list(solution))
+        self._remember(key, entry)
+        self._write(key, entry)
+
+    def hit_rate(self):
+        """ Доля обращений, найденных в кеше """
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def _remember(self, key, entry):
+        """ Запись в памяти с вытеснением давно не использованных """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def _read(self, key):
+        """ Чтение записи с диска, None - если ее нет или каталог не задан """
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return [tuple(path) for path in data['words']], data['solution']
+
+    def _write(self, key, entry):
+        """ Запись на диск; при ошибке записи результат остается только в памяти """
+        if self.directory is None:
+            return
+        data = json.dumps({'words': entry[0], 'solution': entry[1]}, separators=(',', ':'))
+        try:
+            write_file_atomic(self._path(key), [data.encode('utf-8')])
+        except OSError:
+            pass
@@ -0,0 +1,165 @@
+"""
+Векторный поиск слов на игровом поле (NumPy).
+
+Пути одной длины обрабатываются все сразу: из всех начальных ячеек, уровень за уровнем.
+Уровень - набор массивов: матрица номеров ячеек путей, маски занятых путем ячеек и полиномиальные хеши
+слова пути и его обращения. Переход к следующему уровню продлевает все пути с конца через таблицу соседей
+и оставляет только те, чей хеш есть среди хешей префиксов слов словаря.
+Хеши только отсекают пути: найденные слова проверяются по словарю строками, поэтому совпадение хешей
+не дает лишних слов. Найденные пути те же, что у поиска по префиксному дереву (iter_paths_trie),
+но слова одной начальной ячейки выдаются по возрастанию длины, а не в порядке обхода дерева.
+"""
+import numpy as np
+
+
+# Основание полиномиального хеша (вычисления по модулю 2 ** 64)
+HASH_MODULUS = 1 << 64
+HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+
+# Наибольшее число соседей ячейки
+MAX_NEIGHBORS = 4
+
+
+def _contains(table, values):
+    """ Признаки вхождения значений в отсортированный массив table """
+    if not len(table):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.searchsorted(table, values)
+    positions[positions == len(table)] = 0
+    return table[positions] == values
+
+
+class HashedWords:
+    """ Хеши слов словаря и всех их префиксов для векторного поиска """
+
+    def __init__(self, words):
+        words = sorted(words)
+        self.max_length = max(map(len, words), default=0)
+        # Буквы нумеруются с единицы, буквы не из словаря получают общий номер за последней буквой
+        alphabet = np.unique(np.frombuffer(''.join(words).encode('utf-32-le'), dtype=np.uint32))
+        self.alphabet = alphabet
+        self.unknown = np.uint64(len(alphabet) + 1)
+
+        lengths = np.array([len(word) for word in words], dtype=np.int64)
+        letters = self.letter_codes(''.join(words))
+        starts = np.cumsum(lengths) - lengths
+        hashes = np.zeros(len(words), dtype=np.uint64)
+        prefixes = []
+        for position in range(self.max_length):  # Хеши префиксов длины position + 1 всех слов сразу
+            longer = np.flatnonzero(lengths > position)
+            hashes[longer] = hashes[longer] * HASH_BASE + letters[starts[longer] + position]
+            prefixes.append(hashes[longer])
+        self.prefixes = np.unique(np.concatenate(prefixes)) if prefixes else hashes
+        self.words = np.unique(hashes)
+
+    def letter_codes(self, text):
+        """ Номера букв строки """
+        points = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        if not len(self.alphabet):
+            return np.full(len(points), self.unknown, dtype=np.uint64)
+        codes = np.searchsorted(self.alphabet, points)
+        codes[codes == len(self.alphabet)] = 0
+        known = self.alphabet[codes] == points
+        return np.where(known, codes + 1, self.unknown).astype(np.uint64)
+
+
+def find_board_paths(board, starts=None, stats=None, budget=None):
+    """
+    Поиск слов из ячеек с номерами starts (по умолчанию - из всех ячеек поля) сразу для всех ячеек.
+    Возвращает словарь: номер начальной ячейки -> кортежи номеров ячеек найденных слов,
+    короткие слова раньше длинных.
+    Правила те же, что у iter_paths_trie: слово ищется из ячейки с его первой буквой, путь, который читается
+    словом в обоих направлениях, остается за концом, раньше идущим в обходе поля (board.ranks),
+    через занятую ячейку проходит только поиск из нее самой.
+    budget - необязательный FillBudget: когда время вышло, поиск прекращается перед следующей длиной пути.
+    """
+    size = len(board.cells)
+    starts = list(range(size)) if starts is None else list(starts)
+    found = {start: [] for start in starts}
+    hashed = board.candidates.get_hashed_words()
+    if not starts or not hashed.max_length:
+        return found
+
+    letters, dictionary, ranks = board.letters, board.dictionary, board.ranks
+    codes = np.append(hashed.letter_codes(letters), np.uint64(0))  # Последний элемент - для фиктивной ячейки
+    # Таблица соседей; недостающие соседи - фиктивная ячейка size, она всегда занята
+    neighbors = np.full((size, MAX_NEIGHBORS), size, dtype=np.int64)
+    for index, adjacent in enumerate(board.neighbors):
+        neighbors[index, :len(adjacent)] = adjacent
+    # Маски занятых ячеек: по 64 ячейки в слове
+    mask_words = (size + 1 + 63) // 64
+    occupied = [index for index, cell in enumerate(board.cells) if cell.bit & board.occupied]
+    blocked = np.zeros(mask_words, dtype=np.uint64)
+    for index in occupied + [size]:
+        blocked[index >> 6] |= np.uint64(1) << np.uint64(index & 63)
+
+    cells = np.array(starts, dtype=np.int64)
+    # Обращение пути, который оканчивается в более ранней ячейке, уже найдено поиском из нее;
+    # для занятой начальной ячейки обращения не учитываются
+    rank_array = np.array(ranks, dtype=np.int64)
+    firsts = rank_array[cells]
+    firsts[np.isin(cells, occupied)] = -1
+
+    # Первый уровень: пути из одной ячейки
+    hashes = codes[cells]
+    alive = _contains(hashed.prefixes, hashes)
+    cells, firsts, hashes = cells[alive], firsts[alive], hashes[alive]
+    paths = cells[:, None]
+    masks = np.tile(blocked, (len(cells), 1))
+    masks[np.arange(len(cells)), cells >> 6] |= np.uint64(1) << (cells & 63).astype(np.uint64)
+    reverse_hashes = hashes.copy()  # Хеши слов путей, прочитанных с конца
+    power = int(HASH_BASE)  # Вес следующей буквы в хеше обращения
+    length = 1
+
+    while len(paths):
+        if stats is not None:
+            stats.count('paths_popped', len(paths))
+
+        # Слова уровня: хеш совпал с хешем слова - слово проверяется строкой
+        rows = np.flatnonzero(_contains(hashed.words, hashes))
+        reversible = _contains(hashed.words, reverse_hashes[rows])  # Обращение, возможно, тоже слово
+        for row, maybe_reversed in zip(rows.tolist(), reversible.tolist()):
+            path = tuple(paths[row].tolist())
+            word = ''.join(letters[index] for index in path)
+            if word not in dictionary:
+                continue  # Совпадение хешей
+            # Путь, который читается словом в обоих направлениях, добавляется только один раз
+            if not maybe_reversed or ranks[path[-1]] > firsts[row] or word[::-1] not in dictionary:
+                if stats is not None:
+                    stats.count('words_found')
+                found[path[0]].append(path)
+            elif stats is not None:
+                stats.count('paths_duplicate')  # Слово уже найдено в обратном направлении
+
+        if length == hashed.max_length or budget is not None and budget.expired():
+            break
+
+        # Продление всех путей с конца свободными соседними ячейками
+        rows = np.repeat(np.arange(len(paths)), MAX_NEIGHBORS)
+        nexts = neighbors[paths[:, -1]].ravel()
+        slots, bits = nexts >> 6, np.uint64(1) << (nexts & 63).astype(np.uint64)
+        free = (masks[rows, slots] & bits) == 0
+        rows, nexts, slots, bits = rows[free], nexts[free], slots[free], bits[free]
+
+        # Остаются только пути, слово которых - префикс слова словаря
+        new_hashes = hashes[rows] * HASH_BASE + codes[nexts]
+        alive = _contains(hashed.prefixes, new_hashes)
+        if stats is not None:
+            stats.record_checks(length + 1, len(alive), int(len(alive) - alive.sum()))
+            stats.count('paths_created', int(alive.sum()))
+        rows, nexts, slots, bits = rows[alive], nexts[alive], slots[alive], bits[alive]
+
+        paths = np.concatenate((paths[rows], nexts[:, None]), axis=1)
+        masks = masks[rows]
+        masks[np.arange(len(rows)), slots] |= bits
+        hashes = new_hashes[alive]
+        reverse_hashes = reverse_hashes[rows] + codes[nexts] * np.uint64(power)
+        firsts = firsts[rows]
+        power = power * int(HASH_BASE) % HASH_MODULUS
+        length += 1
+    return found
+
+
+def iter_paths_vector(board, start, stats=None):
+    """ Генератор слов, начинающихся в ячейке с номером start (см. find_board_paths) """
+    yield from find_board_paths(board, [start], stats)[start]